@@ -3,20 +3,39 @@
 # Default version used for the SMHI API
 DEFAULT_VERSION = "1.0" #latest
 
+# Base URL of the SMHI API host (change with set_base_url, e.g. for a local test server)
+BASE_URL = "http://opendata-download-metobs.smhi.se"
+
 # Base version URL
-ADR_VERSION = "http://opendata-download-metobs.smhi.se/api/version/1.0.json"
+ADR_VERSION = BASE_URL + "/api/version/1.0.json"
 
 # Base parameter URL (use to list available parameters)
-ADR_PARAMETER = "http://opendata-download-metobs.smhi.se/api/version/1.0/parameter/{parameter}.json"
+ADR_PARAMETER = BASE_URL + "/api/version/1.0/parameter/{parameter}.json"
 
 # Specific station URL for a given parameter
-ADR_STATION = "http://opendata-download-metobs.smhi.se/api/version/1.0/parameter/{parameter}/station/{station}.json"
+ADR_STATION = BASE_URL + "/api/version/1.0/parameter/{parameter}/station/{station}.json"
 
 # Latest months data (default is JSON)
-ADR_LATEST_MONTHS = "http://opendata-download-metobs.smhi.se/api/version/1.0/parameter/{parameter}/station/{station}/period/latest-months/data.json"
+ADR_LATEST_MONTHS = BASE_URL + "/api/version/1.0/parameter/{parameter}/station/{station}/period/latest-months/data.json"
 
 # Corrected historical archive data (default format is CSV)
-ADR_CORRECTED = "http://opendata-download-metobs.smhi.se/api/version/1.0/parameter/{parameter}/station/{station}/period/corrected-archive/data.csv"
+ADR_CORRECTED = BASE_URL + "/api/version/1.0/parameter/{parameter}/station/{station}/period/corrected-archive/data.csv"
+
+
+def set_base_url(base_url):
+    """
+    Set the base URL of the API host for all endpoints.
+    
+    :param base_url: The new base URL (e.g., 'http://localhost:8000')
+    """
+    global BASE_URL, ADR_VERSION, ADR_PARAMETER, ADR_STATION, ADR_LATEST_MONTHS, ADR_CORRECTED
+    old_base_url = BASE_URL
+    BASE_URL = base_url.rstrip('/')
+    ADR_VERSION = ADR_VERSION.replace(old_base_url, BASE_URL, 1)
+    ADR_PARAMETER = ADR_PARAMETER.replace(old_base_url, BASE_URL, 1)
+    ADR_STATION = ADR_STATION.replace(old_base_url, BASE_URL, 1)
+    ADR_LATEST_MONTHS = ADR_LATEST_MONTHS.replace(old_base_url, BASE_URL, 1)
+    ADR_CORRECTED = ADR_CORRECTED.replace(old_base_url, BASE_URL, 1)
 
 
 # -- Functions for dynamic URLs
@@ -32,7 +51,22 @@ def get_period_url(parameter, station, period, file_format="json", version=DEFAU
     :param version: The API version to use (defaults to DEFAULT_VERSION)
     :return: The full API URL for the given period
     """
-    base_url = "http://opendata-download-metobs.smhi.se/api/version/{version}/parameter/{parameter}/station/{station}/period/{period}.{file_format}"
+    base_url = BASE_URL + "/api/version/{version}/parameter/{parameter}/station/{station}/period/{period}.{file_format}"
+    return base_url.format(version=version, parameter=parameter, station=station, period=period, file_format=file_format)
+
+
+def get_period_data_url(parameter, station, period, file_format="json", version=DEFAULT_VERSION):
+    """
+    Dynamically generates the data URL for a given period, parameter, and station.
+    
+    :param parameter: The weather parameter ID (e.g., 1 for air temperature)
+    :param station: The station ID
+    :param period: The period to fetch data for ('latest-hour', 'latest-day', 'latest-months', 'corrected-archive')
+    :param file_format: The format of the data ('json', 'xml', 'csv')
+    :param version: The API version to use (defaults to DEFAULT_VERSION)
+    :return: The full API URL for the data of the given period
+    """
+    base_url = BASE_URL + "/api/version/{version}/parameter/{parameter}/station/{station}/period/{period}/data.{file_format}"
     return base_url.format(version=version, parameter=parameter, station=station, period=period, file_format=file_format)
 
 
@@ -46,7 +80,7 @@ def get_corrected_data_url(parameter, station, file_format="csv", version=DEFAUL
     :param version: The API version to use (defaults to DEFAULT_VERSION)
     :return: The full API URL for the corrected archive data
     """
-    base_url = "http://opendata-download-metobs.smhi.se/api/version/{version}/parameter/{parameter}/station/{station}/period/corrected-archive/data.{file_format}"
+    base_url = BASE_URL + "/api/version/{version}/parameter/{parameter}/station/{station}/period/corrected-archive/data.{file_format}"
     return base_url.format(version=version, parameter=parameter, station=station, file_format=file_format)
 
 
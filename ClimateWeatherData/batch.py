@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Batch computation of climate indicators for many stations and periods.
+
+Each station is computed in a worker process (see climate.compute_indicators), and the
+rows (one per station and period) are appended to a CSV file as the stations finish.
+A partially completed run is resumed by skipping the stations already in the output.
+Stations that failed (e.g. a download error) are not written, so they are computed again on resume.
+
+Usage:
+    python -m ClimateWeatherData.batch 162860 97400 --start 1991 --end 2020 -o indicators.csv
+"""
+import argparse
+import csv
+import os
+import sys
+
+from ClimateWeatherData import climate, helpers
+
+# Heavy dependencies are loaded on first use
+pd = helpers.lazy_import('pandas')
+
+
+# First columns of the output
+KEY_COLUMNS = ['station', 'period']
+
+
+def compute_station(station, indicators, ts, time_period):
+    """
+    Computes the indicators of a station for every period in a range (run in a worker process).
+
+    Indicators of parameters not available for the station, or whose data can not be loaded, are
+    empty (see climate.load_weather_data). Download errors are raised so that the station is
+    reported as failed and computed again when the run is resumed.
+
+    :param station: The station ID or name.
+    :param indicators: List of indicator names.
+    :param ts: Tuple (start, end) of timestamps.
+    :param time_period: Time period ('y', 'm', 's').
+    :return: List of rows (station, period, indicator values...) formatted for the output.
+    """
+    df = climate.compute_indicators(station, ts, time_period=time_period, indicators=indicators, errors='coerce')
+
+    rows = []
+    for period, values in df.iterrows():
+        rows.append([station, str(period)] + [format_value(values[name]) for name in indicators])
+    return rows
+
+
+def format_value(value):
+    # Empty for missing values, dates in ISO format
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NaT:
+        return ''
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    return value
+
+
+def read_completed(output, header, n_periods):
+    """
+    Reads the stations completed in an earlier run.
+
+    Rows of stations with missing periods (an interrupted write) are removed from the file,
+    so that these stations are computed again.
+
+    :param output: Path to the CSV output.
+    :param header: The expected header.
+    :param n_periods: Number of periods (rows) of a completed station.
+    :return: Set of completed stations (as strings).
+    """
+    if not os.path.isfile(output):
+        return set()
+
+    with open(output, newline='', encoding='utf-8') as fp:
+        rows = list(csv.reader(fp))
+    if not rows:
+        return set()
+    if rows[0] != header:
+        raise ValueError(f"The columns of {output} do not match the requested indicators")
+
+    # Complete rows by station
+    stations = {}
+    for row in rows[1:]:
+        if len(row) == len(header):
+            stations.setdefault(row[0], []).append(row)
+    completed = {station for station, station_rows in stations.items() if len(station_rows) == n_periods}
+
+    # Rewrite the file without incomplete stations
+    if sum(len(stations[station]) for station in completed) != len(rows) - 1:
+        tmp_output = output + '.tmp'
+        with open(tmp_output, 'w', newline='', encoding='utf-8') as fp:
+            writer = csv.writer(fp)
+            writer.writerow(header)
+            for station in completed:
+                writer.writerows(stations[station])
+        os.replace(tmp_output, output)
+
+    return completed
+
+
+def run_batch(stations, indicators=None, ts=('1991', '2020'), time_period='y', output='indicators.csv',
+              processes=None, resume=True):
+    """
+    Computes indicators for many stations and periods in a process pool, streaming the results to a CSV file.
+
+    :param stations: List of station IDs or names.
+    :param indicators: List of indicator names (see climate.list_indicators). If None, all implemented indicators
+                       defined for the time period.
+    :param ts: Tuple (start, end) of timestamps, e.g. ('1991', '2020').
+    :param time_period: Time period ('y', 'm', 's') of the rows, it must be defined for every indicator
+                        (see climate.get_indicator_period).
+    :param output: Path to the CSV output with columns station, period and one column per indicator.
+    :param processes: Number of worker processes (default is the number of CPUs). With 1, the
+                      stations are computed in this process.
+    :param resume: If True, stations already completed in the output are skipped, else the output is overwritten.
+    :return: List of stations that failed, not written to the output and computed again when resumed.
+    """
+    if indicators is None:
+        indicators = climate.get_indicator_names(time_period)
+    for name in indicators:
+        climate.get_indicator_period(name, time_period)
+    header = KEY_COLUMNS + list(indicators)
+    n_periods = len(helpers.get_periods(ts, time_period))
+
+    # Stations left to compute
+    completed = read_completed(output, header, n_periods) if resume else set()
+    pending = [station for station in stations if str(station) not in completed]
+    if completed:
+        print(f"Resuming, {len(stations) - len(pending)} of {len(stations)} stations already completed")
+
+    failed = []
+    new_file = not resume or not os.path.isfile(output) or os.path.getsize(output) == 0
+    with open(output, 'w' if new_file else 'a', newline='', encoding='utf-8') as fp:
+        writer = csv.writer(fp)
+        if new_file:
+            writer.writerow(header)
+            fp.flush()
+
+        def write(station, rows, count):
+            # All rows of a station at once, so an interrupted run loses at most the stations in progress
+            writer.writerows(rows)
+            fp.flush()
+            print(f"[{len(stations) - len(pending) + count}/{len(stations)}] station {station}")
+
+        if processes == 1:
+            for i, station in enumerate(pending):
+                try:
+                    write(station, compute_station(station, indicators, ts, time_period), i + 1)
+                except Exception as e:
+                    print(f"Station {station} failed: {e}")
+                    failed.append(station)
+            return failed
+
+        # Imported here, concurrent.futures is only needed with several processes
+        from concurrent import futures
+        with futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            jobs = {
+                executor.submit(compute_station, station, indicators, ts, time_period) : station
+                for station in pending
+                }
+            for i, job in enumerate(futures.as_completed(jobs)):
+                station = jobs[job]
+                try:
+                    write(station, job.result(), i + 1)
+                except Exception as e:
+                    print(f"Station {station} failed: {e}")
+                    failed.append(station)
+
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m ClimateWeatherData.batch',
+        description='Compute climate indicators for many stations and periods.'
+        )
+    parser.add_argument('stations', nargs='*', help='station IDs or names')
+    parser.add_argument('--stations-file', help='file with one station ID or name per line')
+    parser.add_argument('-i', '--indicators', nargs='+', help='indicator names (default all)')
+    parser.add_argument('--start', default='1991', help='start of the range, e.g. 1991')
+    parser.add_argument('--end', default='2020', help='end of the range, e.g. 2020')
+    parser.add_argument('-t', '--time-period', default='y', help="time period of the rows ('y', 'm', 's')")
+    parser.add_argument('-o', '--output', default='indicators.csv', help='CSV output file')
+    parser.add_argument('-p', '--processes', type=int, help='number of worker processes (default number of CPUs)')
+    parser.add_argument('--no-resume', action='store_true', help='overwrite the output instead of resuming')
+    args = parser.parse_args(argv)
+
+    stations = list(args.stations)
+    if args.stations_file:
+        with open(args.stations_file, encoding='utf-8') as fp:
+            stations += [line.strip() for line in fp if line.strip()]
+    if not stations:
+        parser.error('no stations given')
+
+    # Station IDs as numbers
+    stations = [int(station) if station.isdigit() else station for station in stations]
+
+    failed = run_batch(stations, indicators=args.indicators, ts=(args.start, args.end), time_period=args.time_period,
+                       output=args.output, processes=args.processes, resume=not args.no_resume)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk cache for data downloaded from the SMHI API.
+
+Entries are keyed by (parameter, station, endpoint) and stored together with the
+station's 'updated' timestamp from the parameter endpoint. An entry is only
+returned if that timestamp still matches, so new data published by SMHI
+invalidates the cached copy automatically. Entries written in another format
+(see FORMAT_VERSION) are ignored.
+"""
+import os
+import pickle
+
+
+# -- globals
+
+# Cache directory (override with the SMHI_CACHE_DIR environment variable or set_cache_dir)
+CACHE_DIR = os.environ.get(
+    'SMHI_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'ClimateWeatherData')
+    )
+
+# Set to False to disable the cache globally
+USE_CACHE = True
+
+# Version of the format of the cached data, increase when the stored data changes
+# (e.g., precipitation types encoded as codes), entries of other versions are ignored
+FORMAT_VERSION = 2
+
+
+# -- functions
+
+def set_cache_dir(path):
+    """
+    Set the directory used for cached data.
+
+    :param path: Path to the cache directory (created on first write).
+    """
+    global CACHE_DIR
+    CACHE_DIR = path
+
+
+def get_cache_path(parameter, station, endpoint):
+    """
+    Returns the file path of the cache entry for a parameter, station and endpoint.
+
+    :param parameter: The weather parameter ID.
+    :param station: The station ID.
+    :param endpoint: The endpoint/period name (e.g., 'corrected-archive').
+    :return: Path to the cache file.
+    """
+    filename = '{0}_{1}_{2}.pkl'.format(endpoint, parameter, station)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def load(parameter, station, endpoint, updated=None):
+    """
+    Load a cached entry.
+
+    :param parameter: The weather parameter ID.
+    :param station: The station ID.
+    :param endpoint: The endpoint/period name.
+    :param updated: The current 'updated' timestamp of the station. If given, the entry
+                    is only returned if it was stored with the same timestamp.
+    :return: The cached data, or None if there is no valid entry (or it has another format version).
+    """
+    path = get_cache_path(parameter, station, endpoint)
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path, 'rb') as fp:
+            entry = pickle.load(fp)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        # Broken entry, treat as a miss (it is overwritten on the next store)
+        return None
+
+    # Entries stored in another format
+    if not isinstance(entry, dict) or entry.get('version') != FORMAT_VERSION:
+        return None
+
+    # Check freshness against the station's updated timestamp
+    if updated is not None and entry.get('updated') != updated:
+        return None
+
+    return entry['data']
+
+
+def store(data, parameter, station, endpoint, updated=None):
+    """
+    Store data in the cache.
+
+    :param data: The data to store (e.g., a DataFrame).
+    :param parameter: The weather parameter ID.
+    :param station: The station ID.
+    :param endpoint: The endpoint/period name.
+    :param updated: The 'updated' timestamp of the station when the data was downloaded.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = get_cache_path(parameter, station, endpoint)
+
+    # Write to a temporary file first so that readers never see a partial entry
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as fp:
+        pickle.dump({'version': FORMAT_VERSION, 'updated': updated, 'data': data}, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def clear(endpoint=None):
+    """
+    Remove cached entries.
+
+    :param endpoint: Only remove entries for this endpoint/period name. If None, remove all entries.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    for filename in os.listdir(CACHE_DIR):
+        if not filename.endswith('.pkl'):
+            continue
+        if endpoint is None or filename.startswith(endpoint + '_'):
+            os.remove(os.path.join(CACHE_DIR, filename))
@@ -4,7 +4,32 @@ Created on Sun May 22 15:10:49 2022
 
 @author: Johan Odelius
 """
-from ClimateWeatherData import smhi, helpers
+from ClimateWeatherData import smhi, helpers, cache
+import collections
+import functools
+import hashlib
+import inspect
+import operator
+import warnings
+
+# Heavy dependencies are loaded on first use
+pd = helpers.lazy_import('pandas')
+np = helpers.lazy_import('numpy')
+
+# Number of indicator results kept in memory (least recently used dropped first), see cached_result
+RESULT_CACHE_SIZE = 1024
+
+# Set to True to also keep indicator results in the on-disk cache (see cache module)
+RESULT_CACHE_PERSISTENT = False
+
+# Cached indicator results by key, each as (data version, result)
+_results = collections.OrderedDict()
+
+# Number of aggregate indexes (one per station and weather parameter) kept in memory, see get_aggregate_index
+AGGREGATE_INDEX_SIZE = 64
+
+# Aggregate indexes by (weather parameter, station ID), each as (data version, index)
+_aggregate_indexes = collections.OrderedDict()
 
 # sub functions
 def list_indicators():    
@@ -51,1074 +76,1268 @@ def isin_station(station, parameter_type='all', ts=None, full_period=False):
     return smhi.get_station_value(station) in df_stations['id'].to_list()
 
 
+def memoized(function):
+    """
+    Memoizes the results of an indicator function, see cached_result.
+    
+    :param function: Indicator function with arguments (station, ts, time_period, ..., data).
+    :return: The indicator function.
+    """
+    @functools.wraps(function)
+    def indicator(station, ts, *args, **kwargs):
+        return cached_result(function, station, ts, *args, **kwargs)
+    return indicator
+
+
+def get_data_version(function, station):
+    """
+    Returns the data version of an indicator for a station, i.e. when SMHI last updated the
+    station's data for each weather parameter of the indicator.
+    
+    :param function: Indicator function.
+    :param station: The station ID.
+    :return: Tuple of 'updated' timestamps, or None if a parameter is not available for the station.
+    """
+    version = tuple(
+        smhi.get_station_updated(weather_parameter, station)
+        for weather_parameter in INDICATORS[function.__name__]['parameters'].values()
+        )
+    return None if None in version else version
+
+
+def cached_result(function, station, ts, *args, **kwargs):
+    """
+    Returns an indicator result, computed once and kept in a bounded in-memory cache
+    (RESULT_CACHE_SIZE) and optionally in the on-disk cache (RESULT_CACHE_PERSISTENT, not
+    with cache.USE_CACHE False).
+    
+    Results are keyed by the indicator arguments (station ID, time range and time period) and
+    the data version of the station (see get_data_version), so stale results are dropped
+    when SMHI updates the station. Results computed from preloaded data are not cached.
+    
+    :param function: Indicator function (not decorated).
+    :param station, ts, args, kwargs: Arguments of the indicator function.
+    :return: The indicator result (a copy for Series).
+    """
+    persistent = RESULT_CACHE_PERSISTENT and cache.USE_CACHE
+    arguments = inspect.signature(function).bind(station, ts, *args, **kwargs)
+    arguments.apply_defaults()
+    if arguments.arguments['data'] is not None or (RESULT_CACHE_SIZE == 0 and not persistent):
+        return function(station, ts, *args, **kwargs)
+    
+    # Key of the arguments, with the time range of the time period(s)
+    station_id = smhi.get_station_value(station)
+    time_period = arguments.arguments['time_period']
+    if isinstance(ts, (list, tuple)):
+        ts_range = ('series',) + tuple(helpers.get_period_range(ts, time_period))
+    else:
+        ts_range = helpers.format_ts(ts, time_period=time_period)
+    options = tuple(
+        (name, value) for name, value in arguments.arguments.items()
+        if name not in ['station', 'ts', 'time_period', 'data']
+        )
+    key = (function.__name__, station_id, ts_range, time_period, options)
+    
+    version = get_data_version(function, station_id)
+    if version is None:
+        return function(station, ts, *args, **kwargs)
+    
+    # In-memory cache
+    entry = _results.get(key)
+    if entry is not None and entry[0] == version:
+        _results.move_to_end(key)
+        result = entry[1]
+    else:
+        result = None
+        
+        # On-disk cache
+        if persistent:
+            result_name = '{0}-{1}'.format(function.__name__, hashlib.sha1(repr(key).encode()).hexdigest()[:16])
+            result = cache.load(result_name, station_id, 'indicator', updated=version)
+        
+        if result is None:
+            result = function(station, ts, *args, **kwargs)
+            if persistent:
+                cache.store(result, result_name, station_id, 'indicator', updated=version)
+        
+        if RESULT_CACHE_SIZE > 0:
+            _results[key] = (version, result)
+            _results.move_to_end(key)
+            while len(_results) > RESULT_CACHE_SIZE:
+                _results.popitem(last=False)
+    
+    if isinstance(result, pd.Series):
+        return result.copy()
+    return result
+
+
+def clear_results(persistent=True):
+    """
+    Clears the cached indicator results.
+    
+    :param persistent: Also remove the results in the on-disk cache.
+    """
+    _results.clear()
+    _aggregate_indexes.clear()
+    if persistent:
+        cache.clear('indicator')
+
+
+def get_weather_data(weather_parameter, station, ts, time_period, data=None, idx=None):
+    """
+    Returns the weather parameter values used by an indicator.
+    
+    :param weather_parameter: The weather parameter name.
+    :param station: The station ID or name.
+    :param ts: Timestamp, or tuple (start, end) of timestamps with time_period None.
+    :param time_period: Time period ('y', 'm', 's').
+    :param data: Optional dictionary of preloaded values by weather parameter, already
+                 selected for the time period (see compute_indicators). If None, the values are downloaded.
+    :param idx: The index column, detected automatically if not provided.
+    :return: Series with the weather parameter values, named 'Value'.
+    """
+    if data is None:
+        values = smhi.get_weather_data(weather_parameter, station, ts, time_period, idx=idx)
+    else:
+        values = data[weather_parameter]
+    
+    # Indicators join several parameters on the 'Value' column
+    return values.rename('Value')
+
+
 
 # %% Temperature
 
 # Medeltemperatur
-def TAS(station, ts, time_period='y'):
+@memoized
+def TAS(station, ts, time_period='y', data=None):
     # Medeltemperatur (TAS)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp ('2020-01-10')
+    #   ts              : timestamp ('2020-01-10'), or tuple (start, end) for values by period
     #   time_period     : time period ('y','s'), default 'y'
-    
-    weather_parameter = 'TemperatureMeanPastMonth'
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Mean of TemperatureMeanPastMonth
-    value = parameter_values.mean()
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    return value
+    return evaluate_indicator('TAS', station, ts, time_period, data)
 
 # Dygnsmaxtemperatur
-def TX(station, ts, time_period='y'):
+@memoized
+def TX(station, ts, time_period='y', data=None):
     # Dygnsmaxtemperatur (TX)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y','s','m'), default 'y'
-    
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Max of TemperatureMaxPast24h
-    value = parameter_values.max()
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('TX', station, ts, time_period, data)
 
 # Dygnsminimitemperatur
-def TN(station, ts, time_period='y'):
+@memoized
+def TN(station, ts, time_period='y', data=None):
     # Dygnsminimitemperatur (TN)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y','s','m'), default 'y'
-    
-    weather_parameter = 'TemperatureMinPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Min of TemperatureMinPast24h
-    value = parameter_values.min()
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('TN', station, ts, time_period, data)
 
 # Dygnsamplitud (varmast minus kallast)
-def DTR(station, ts, time_period='m'):
+@memoized
+def DTR(station, ts, time_period='m', data=None):
     # Dygnsamplitud (varmast minus kallast) (DTR)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('m'), default 'm'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'TemperatureMinPast24h'
-    # Filter based on failure time and time period
-    temperature_min = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    temperature_max = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-   
-    # Amplitude: max temperature - min temperature
-    amplitude = temperature_max-temperature_min
-
-    # Max of daily amplitude values
-    value = amplitude.max()
-
-    return value
-
+    return evaluate_indicator('DTR', station, ts, time_period, data)
 
 # Varma dagar/högsommardagar (Maxtemperatur >20 ºC)
-def WarmDays(station, ts, time_period='y'):
+@memoized
+def WarmDays(station, ts, time_period='y', data=None):
     # Varma dagar (WarmDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y','s'), default 'y'
-    
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Number of days over 20 deg
-    value = (parameter_values > 20).sum()
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('WarmDays', station, ts, time_period, data)
 
 # Värmebölja (dagar i följd med maxtemperatur > 20ºC)
-def ConWarmDays(station, ts, time_period='y'):
+@memoized
+def ConWarmDays(station, ts, time_period='y', data=None):
     # Värmebölja (ConWarmDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Days in a row with temperature more than 20 deg
-    number_of_days = 0
-    max_number_of_days = 0
-    temperature_threshold = 20
-    for value in parameter_values:
-        if value > temperature_threshold:
-            number_of_days += 1
-            max_number_of_days = max(max_number_of_days, number_of_days)
-        else:
-            number_of_days = 0
-    
-    return max_number_of_days
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
+
+    return evaluate_indicator('ConWarmDays', station, ts, time_period, data)
 
 # Nollgenomgångar (Antal dagar med högsta temp > 0ºC och lägsta temp < 0ºC)
-def ZeroCrossingDays(station, ts, time_period='s'):
+@memoized
+def ZeroCrossingDays(station, ts, time_period='s', data=None):
     # Nollgenomgångar (ZeroCrossingDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s'), default 's'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'TemperatureMinPast24h'
-    # Filter based on failure time and time period
-    temperature_min = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    temperature_max = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Min temperature less than 0 and max temperature more than 0
-    if temperature_min.size>0:
-        if isinstance(ts, (list, tuple)):
-            if time_period == 's':
-                time_period = '3M'
-            value = ((temperature_min < 0) & (temperature_max > 0)).resample(time_period).sum()
-        else:
-            value = ((temperature_min < 0) & (temperature_max > 0)).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    return evaluate_indicator('ZeroCrossingDays', station, ts, time_period, data)
 
 # Vegetationsperioden
 def VegSeason(ser, temperature=5, days=4):
-    # 4 days in a row with temperature more than 5 deg
-
-    # Initialize variables
-    number_of_days_above = 0
-    veg_start = ser.iloc[-1]
-    
-    for idx, value in ser.iteritems():
-        if value > temperature:
-            number_of_days_above += 1
-            if number_of_days_above >= days:
-                veg_start = idx  # Vegperiod start
-                break
-        else:
-            number_of_days_above = 0
-    
-    # Initialize variables
-    number_of_days_below = 0
-    previous = ser.loc[[veg_start]].index
-    for idx, value in ser.loc[veg_start:].iteritems():
-        # if start of vegperiod set and after 1 July 
-        if idx.month >= 7 and value <= temperature:
-            number_of_days_below += 1
-            if number_of_days_below >= days:
-                veg_end = previous  # Vegperiod slut
-                break
-        else:
-            number_of_days_below = 0
-            previous = idx
+    # Start: last day of the first period of 4 days in a row with temperature more than 5 deg
+    # End: last day before 4 days in a row with temperature at most 5 deg, after 1 July
+    # NaT if the start or end is not found
+    veg_start = pd.NaT
+    veg_end = pd.NaT
+    values = ser.to_numpy()
+    
+    # Vegperiod start
+    runs = helpers.run_lengths(values > temperature)
+    i_start = np.flatnonzero(runs['length'] >= days)
+    if i_start.size == 0:
+        return veg_start, veg_end
+    start = runs['start'][i_start[0]] + days - 1
+    veg_start = ser.index[start]
+    
+    # Vegperiod end, searched from the start of the vegperiod
+    below = (values <= temperature) & (ser.index.month >= 7)
+    below[:start] = False
+    runs = helpers.run_lengths(below)
+    i_end = np.flatnonzero(runs['length'] >= days)
+    if i_end.size > 0:
+        veg_end = ser.index[runs['start'][i_end[0]] - 1]
     
     return veg_start, veg_end
 
 # Vegetationsperiodens slut (sista dag i sammanhängande 4-dags period med medeltemp > 5ºC
-def VegSeasonDayEnd(station, ts, time_period='y'):
+@memoized
+def VegSeasonDayEnd(station, ts, time_period='y', temperature=5, data=None):
     # Vegetationsperiodens slut (VegSeasonDayEnd-5)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Vegperiod
-    _,veg_end = VegSeason(parameter_values)
-
-    # Returning last date of vegperiod
-    return veg_end
+    #   temperature     : temperature definition of vegseason (2,5), default is 5
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('VegSeasonDayEnd', station, ts, time_period, data, temperature=temperature)
 
 # Vegetationsperiodens början (sista dag i sammanhängande 4-dags period med medeltemp > 5 ºC)
-def VegSeasonDayStart(station, ts, time_period='y'):
+@memoized
+def VegSeasonDayStart(station, ts, time_period='y', temperature=5, data=None):
     # Vegetationsperiodens början (VegSeasonDayStart-5)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Vegperiod
-    veg_start,_ = VegSeason(parameter_values)
-
-    # Returning first date of vegperiod
-    return veg_start
+    #   temperature     : temperature definition of vegseason (2,5), default is 5
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('VegSeasonDayStart', station, ts, time_period, data, temperature=temperature)
 
 # Vegetationsperiodens längd (medeltemp > 2/5ºC)
-def VegSeasonLentgh(station, ts, time_period='y', temperature=5):
+@memoized
+def VegSeasonLentgh(station, ts, time_period='y', temperature=5, data=None):
     # Vegetationsperiodens längd (VegSeasonLentgh-2/VegSeasonLentgh-5)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
     #   temperature     : temperature definition of vegseason (2,5), default is 5
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Vegperiod
-    veg_start,veg_end = VegSeason(parameter_values)
-
-    # Returning length in days of vegperiod
-    return (veg_end-veg_start).days
-
+    return evaluate_indicator('VegSeasonLentgh', station, ts, time_period, data, temperature=temperature)
 
 # Frostdagar (minimitemperatur < 0ºC )
-def FrostDays(station, ts, time_period='s'):
+@memoized
+def FrostDays(station, ts, time_period='s', data=None):
     # Frostdagar (FrostDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s'), default 's'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-
-    weather_parameter = 'TemperatureMinPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Count days where min temperature is less than 0
-    value = (parameter_values < 0).sum()
-
-    return value
-
+    return evaluate_indicator('FrostDays', station, ts, time_period, data)
 
 # Kalla dagar (maxtemperatur < -7ºC)
-def ColdDays(station, ts, time_period='s'):
+@memoized
+def ColdDays(station, ts, time_period='s', data=None):
     # Kalla dagar (ColdDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s'), default 's'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'TemperatureMaxPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Days with max temperature less than -7
-    value = (parameter_values < -7).sum()
-
-    return value
+    return evaluate_indicator('ColdDays', station, ts, time_period, data)
 
 # %% Nederbörd
 
 # Summa nederbörd
-def PR(station, ts, time_period='y'):
+@memoized
+def PR(station, ts, time_period='y', data=None):
     # Summa nederbörd (PR)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('m','y','s'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Sum of PrecipPast24hAt06
-    value = parameter_values.sum()
-
-    return value
-
+    return evaluate_indicator('PR', station, ts, time_period, data)
 
 # Summa regn
-def PRRN(station, ts, time_period='y'):
+@memoized
+def PRRN(station, ts, time_period='y', data=None):
     # Summa nederbörd (PRRN)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period (y','s'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Join precipitation values with type of precipitation
-    precip_data = precip_values.to_frame().join(precip_types.rename('Type'))
-    
-    # Data for days with rain
-    valid_types = helpers.get_types('Rain')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types),'Value'].groupby(level=0).first()
-    
-    # Sum up all during time period
-    value = precip_valid.sum()
-                        
-    return value
-
+    return evaluate_indicator('PRRN', station, ts, time_period, data)
 
 # Summa snö
-def PRSN(station, ts, time_period='y'):
+@memoized
+def PRSN(station, ts, time_period='y', data=None):
     # Summa snö (PRSN)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period (y','s'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Join precipitation values with type of precipitation
-    precip_data = precip_values.to_frame().join(precip_types.rename('Type'))
-     
-    # Data for days with valid precipitation
-    valid_types = helpers.get_types('Snow')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types),'Value'].groupby(level=0).first()
-    
-    # Sum up all during time period
-    value = precip_valid.sum()  
-    
-    return value
-
+    return evaluate_indicator('PRSN', station, ts, time_period, data)
 
 # Summa underkylt regn
-def SuperCooledPR(station, ts, time_period='y'):
+@memoized
+def SuperCooledPR(station, ts, time_period='y', data=None):
     # Underkylt regn (SuperCooledPR)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Join precipitation values with type of precipitation
-    precip_data = precip_values.to_frame().join(precip_types.rename('Type'))
-     
-    # Cooled rain types
-    valid_types = helpers.get_types('SuperCooledRain')
-    
-    # Data for days with valid precipitation
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types),'Value'].groupby(level=0).first()
-    
-    # Sum up all during time period
-    value = precip_valid.sum()
-
-    return value
-
+    return evaluate_indicator('SuperCooledPR', station, ts, time_period, data)
 
 # Högsta nederbörd under 7 dagar
-def PR7Dmax(station, ts, time_period='y'):
+@memoized
+def PR7Dmax(station, ts, time_period='y', data=None):
     # Högsta nederbörd  (PR7Dmax)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Sum of PrecipPast24hAt06 for rolling window of 7 days (sum or max??)
-    values = parameter_values.rolling(7).sum()
-
-    # Max of sum of precipitation
-    return values.max()
-
+    return evaluate_indicator('PR7Dmax', station, ts, time_period, data)
 
 # Maximal nederbördsintensitet
-def PRmax(station, ts, time_period='y'):
+@memoized
+def PRmax(station, ts, time_period='y', data=None):
     # Maximal nederbörd  (PRmax)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Max of PrecipPast24hAt06
-    value = parameter_values.max()
-
-    return value
-
+    return evaluate_indicator('PRmax', station, ts, time_period, data)
 
 # Maximal snöfallsintensitet
-def PRSNmax(station, ts, time_period='y'):
+@memoized
+def PRSNmax(station, ts, time_period='y', data=None):
     # Maximal snöfall  (PRSNmax)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Join precipitation values with type of precipitation
-    precip_data = precip_values.to_frame().join(precip_types.rename('Type'))
-  
-    # Snow types
-    valid_types = helpers.get_types('Snow') 
-    
-    # precip_data.loc[precip_data['Type'].isin(valid_types)].groupby('Type').max()
-    
-    # Data for days with valid precipitation
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types),'Value'].groupby(level=0).first()
-    
-    # Max during time period
-    value = precip_valid.max()
-
-    return value
-
+    return evaluate_indicator('PRSNmax', station, ts, time_period, data)
 
 # Kraftig nederbörd > 10 mm/dygn
-def PRgt10Days(station, ts, time_period='y'):
+@memoized
+def PRgt10Days(station, ts, time_period='y', data=None):
     # Kraftig nederbörd  (PRgt10Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s','y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Days of more than 10 mm precip
-    value = (parameter_values > 10).sum()
-
-    return value
+    return evaluate_indicator('PRgt10Days', station, ts, time_period, data)
 
 # Extrem nederbörd > 25 mm/dygn
-def PRgt25Days(station, ts, time_period='y'):
+@memoized
+def PRgt25Days(station, ts, time_period='y', data=None):
     # Extrem nederbörd  (PRgt25Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s','y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Days of more than 25 mm precip
-    value = (parameter_values > 25).sum()
-
-    return value
-
+    return evaluate_indicator('PRgt25Days', station, ts, time_period, data)
 
 # Torra dagar (med nederbörd < 1 mm)
-def DryDays(station, ts, time_period='m'):
+@memoized
+def DryDays(station, ts, time_period='m', data=None):
     # Torra dagar  (DryDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('m'), default 'm'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
+    return evaluate_indicator('DryDays', station, ts, time_period, data)
 
-    # Days of less than 1 mm precip
-    if parameter_values.size>0:
-        value = (parameter_values < 1).sum()
-    else:
-        value = float('NaN')
+# Längsta torrperiod (med <1 mm/dag)
+@memoized
+def LnstDryDays(station, ts, time_period='s', data=None):
+    # Längsta torrperiod (LnstDryDays)
+    # Input
+    #   station         : station id [int]
+    #   ts              : timestamp, or tuple (start, end) for values by period
+    #   time_period     : time period ('s'), default 's'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    return value
+    return evaluate_indicator('LnstDryDays', station, ts, time_period, data)
 
 # %% Snö på marken
 # Snötäcke
-def SncDays(station, ts, time_period='y'):
+@memoized
+def SncDays(station, ts, time_period='y', data=None):
     # Snötäcke  (SncDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'SnowDepthPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Number of days with snow
-    if parameter_values.size>0:
-        value = (parameter_values > 0).sum()
-    else:
-        value = float('NaN')
-        
-    return value
+    return evaluate_indicator('SncDays', station, ts, time_period, data)
 
 # Maximalt snödjup (räknat som vatteninnehåll)
-def SNWmax(station, ts, time_period='y'):
+@memoized
+def SNWmax(station, ts, time_period='y', data=None):
     # Maximalt snödjup  (SNWmax)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'SnowDepthPast24h'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    # Maximum snow depth
-    value = parameter_values.max()
-
-    return value
+    return evaluate_indicator('SNWmax', station, ts, time_period, data)
 
 # %% Vind och densitet
 
 # Medelvindhastighet i 10m-nivå
-def SfcWind(station, ts, time_period='y'):
+@memoized
+def SfcWind(station, ts, time_period='y', data=None):
     # Medelvindhastighet  (SfcWind)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('s','y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'WindSpeed'
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, ts, time_period, idx='Date (UTC)')
-    
-    # Daily max of mean windspeed observations
-    values = parameter_values.resample('1D').max()
-
-    # Max of daily max during time period
-    return values.max()
+    return evaluate_indicator('SfcWind', station, ts, time_period, data)
 
 # Maximal byvind (10m-nivå)
 
 
-def WindGustMax(station, ts, time_period='y'):
+@memoized
+def WindGustMax(station, ts, time_period='y', data=None):
     # Maximal byvind  (WindGustMax)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'WindGust'  # Wind Gust
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, ts, time_period, idx='Date (UTC)')
-    
-    # Daily max of wind gust (byvind) observations
-    values = parameter_values.resample('1D').max()
-
-    # Max of daily max during time period
-    return values.max()
-
+    return evaluate_indicator('WindGustMax', station, ts, time_period, data)
 
 # Antal dagar med byvind >21 m/s (10m-nivå)
-def WindyDays(station, ts, time_period='y'):
+@memoized
+def WindyDays(station, ts, time_period='y', data=None):
     # Antal dagar med hård byvind  (WindyDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'WindGust'  # Wind Gust
-    # Filter based on failure time and time period
-    parameter_values = smhi.get_weather_data(weather_parameter, ts, time_period, idx='Date (UTC)')
-    
-    # Number of days with daily max of wind gust (byvind) above 21
-    if parameter_values.size>0:
-        value = (parameter_values.resample('1D').max() > 21).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    return evaluate_indicator('WindyDays', station, ts, time_period, data)
 
 #%% Kombinationsindex
 
 # Nederbörd när temperaturen ligger mellan 0.58 och 2 grader
-def ColdRainDays(station, ts, time_period='y'):
+@memoized
+def ColdRainDays(station, ts, time_period='y', data=None):
     # Dagar kall nederbörd  (ColdRainDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Rain')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Days with precip given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [.58, 2]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        value = (precip_data.loc[i_temperature,'Value']>0).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('ColdRainDays', station, ts, time_period, data)
 
 # Nederbörd ( > 10 mm/dygn) när temperaturen ligger mellan 0.58 och 2 grader
-def ColdRainGT10Days(station, ts, time_period='y'):
+@memoized
+def ColdRainGT10Days(station, ts, time_period='y', data=None):
     # Dagar mkt kall nederbörd  (ColdRainGT10Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Rain')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Number of days of precip > 10 given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [.58, 2]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        precip_threshold = 10
-        value = (precip_data.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
-
+    return evaluate_indicator('ColdRainGT10Days', station, ts, time_period, data)
 
 # Nederbörd ( > 20 mm/dygn) när temperaturen ligger mellan 0.58 och 2 grader
-def ColdRainGT20Days(station, ts, time_period='y'):
+@memoized
+def ColdRainGT20Days(station, ts, time_period='y', data=None):
     # Dagar kraftig kall nederbörd  (ColdRainGT20Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-   # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Rain')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Number of days of precip > 20 given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [.58, 2]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        precip_threshold = 20
-        value = (precip_data.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    return evaluate_indicator('ColdRainGT20Days', station, ts, time_period, data)
 
 # Nederbörd när temperaturen ligger mellan -2 och 0.58 grader
-def WarmSnowDays(station, ts, time_period='y'):
+@memoized
+def WarmSnowDays(station, ts, time_period='y', data=None):
     # Dagar varm snö  (WarmSnowDays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Snow')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Days with precip given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [-2, .58]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        value = (precip_data.loc[i_temperature,'Value']>0).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('WarmSnowDays', station, ts, time_period, data)
 
 # Nederbörd (> 10 mm/dygn) när temperaturen ligger mellan -2 och 0.58 grader
-def WarmSnowGT10Days(station, ts, time_period='y'):
+@memoized
+def WarmSnowGT10Days(station, ts, time_period='y', data=None):
     # Dagar mkt varm snö  (WarmSnowGT10Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Snow')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Number of days of precip > 10 given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [-2, .58]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        precip_threshold = 10
-        value = (precip_data.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('WarmSnowGT10Days', station, ts, time_period, data)
 
 # Nederbörd (> 20 mm/dygn) när temperaturen ligger mellan -2 och 0.58 grader
-def WarmSnowGT20Days(station, ts, time_period='y'):
+@memoized
+def WarmSnowGT20Days(station, ts, time_period='y', data=None):
     # Dagar kraft varm snö  (WarmSnowGT20Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # weather_parameter = 'PrecipTypePast24h'
-    # # Filter based on failure time and time period
-    # precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # precip_data = precip_data.join(precip_types.rename('Type'))
-    # valid_types = helpers.get_types('Snow')
-    # precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)]
-    
-    # Number of days of precip > 20 given temperature interval
-    if precip_values.size>0:
-        temperature_threshold = [-2, .58]
-        i_temperature = (precip_data['Temperature']>temperature_threshold[0]) & (precip_data['Temperature']<temperature_threshold[1])
-        precip_threshold = 20
-        value = (precip_data.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('WarmSnowGT20Days', station, ts, time_period, data)
 
 # Regn när temperaturen är under 2 grader
-def ColdPRRNdays(station, ts, time_period='y'):
+@memoized
+def ColdPRRNdays(station, ts, time_period='y', data=None):
     # Regn under 2 grader  (ColdPRRNdays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with rain
-    valid_types = helpers.get_types('Rain')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
-    
-    # Number of days of rain given temperature interval
-    if precip_valid.size>0:
-        temperature_threshold = 2
-        i_temperature = precip_data['Temperature']<temperature_threshold
-        value = (precip_valid.loc[i_temperature,'Value']>0).sum()
-    else:
-        value = float('NaN')
-
-    return value
-
+    return evaluate_indicator('ColdPRRNdays', station, ts, time_period, data)
 
 # Regn ( > 10 mm/dygn) när temperaturen är under 2 grader
-def ColdPRRNgt10Days(station, ts, time_period='y'):
+@memoized
+def ColdPRRNgt10Days(station, ts, time_period='y', data=None):
     # Regn under 2 grader  (ColdPRRNgt10Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with rain
-    valid_types = helpers.get_types('Rain')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
-    
-    # Number of days of rain more than 10 mm given temperature interval
-    if precip_valid.size>0:
-        temperature_threshold = 2
-        i_temperature = precip_valid['Temperature']<temperature_threshold
-        precip_threshold = 10
-        value = (precip_valid.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    return value
+    return evaluate_indicator('ColdPRRNgt10Days', station, ts, time_period, data)
 
 # Regn ( > 20 mm/dygn) när temperaturen är under 2 grader
-def ColdPRRNgt20Days(station, ts, time_period='y'):
+@memoized
+def ColdPRRNgt20Days(station, ts, time_period='y', data=None):
     # Regn under 2 grader  (ColdPRRNgt20Days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-   
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with rain
-    valid_types = helpers.get_types('Rain')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
-    
-    # Number of days of rain more than 20 mm given temperature threshold
-    if precip_valid.size>0:
-        temperature_threshold = 2
-        i_temperature = precip_valid['Temperature']<temperature_threshold
-        precip_threshold = 20
-        value = (precip_valid.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('ColdPRRNgt20Days', station, ts, time_period, data)
 
 # Snö när temperaturen är över -2 grader
-def WarmPRSNdays(station, ts, time_period='y'):
+@memoized
+def WarmPRSNdays(station, ts, time_period='y', data=None):
     # Snö över -2 grader  (WarmPRSNdays)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with snow
-    valid_types = helpers.get_types('Snow')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
-    
-    # Number of days of rain given temperature interval
-    if precip_valid.size>0:
-        temperature_threshold = -2
-        i_temperature = precip_valid['Temperature']>temperature_threshold
-        value = (precip_valid.loc[i_temperature,'Value']>0).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
+    return evaluate_indicator('WarmPRSNdays', station, ts, time_period, data)
 
 # Snö ( > 10 mm/dygn) när temperaturen är över -2 grader
-def WarmPRSNgt10days(station, ts, time_period='y'):
+@memoized
+def WarmPRSNgt10days(station, ts, time_period='y', data=None):
     # Snö över -2 grader  (WarmPRSNgt10days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
-    
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
 
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
-    
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with snow
-    valid_types = helpers.get_types('Snow')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
-    
-    # Number of days of rain given temperature threshold
-    if precip_valid.size>0:
-        temperature_threshold = -2
-        i_temperature = precip_valid['Temperature']>temperature_threshold
-        precip_threshold = 10
-        value = (precip_valid.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
-
-    return value
+    return evaluate_indicator('WarmPRSNgt10days', station, ts, time_period, data)
 
 # Snö ( > 20 mm/dygn) när temperaturen är över -2 grader
-def WarmPRSNgt20days(station, ts, time_period='y'):
+@memoized
+def WarmPRSNgt20days(station, ts, time_period='y', data=None):
     # Snö över -2 grader  (WarmPRSNgt20days)
     # Input
     #   station         : station id [int]
-    #   ts              : timestamp
+    #   ts              : timestamp, or tuple (start, end) for values by period
     #   time_period     : time period ('y'), default 'y'
+    #   data            : preloaded weather data by parameter (see compute_indicators), optional
+
+    return evaluate_indicator('WarmPRSNgt20days', station, ts, time_period, data)
+
+# %% Indicator registry
+
+# Declarative definition of the indicators (names of the indicator functions)
+#   parameters      : weather parameters by column, joined on the dates of the first one.
+#                     The 'Value' column is reduced.
+#   types           : precipitation type category (see helpers.get_types), the days with
+#                     a type of the category are kept (see smhi.encode_precip_types)
+#   daily           : daily maximum of hourly values
+#   season          : vegetation season (see VegSeason) for the temperature
+#   where           : conditions (column, operator, threshold) selecting the rows
+#   subtract        : column subtracted from the values
+#   condition       : condition (operator, threshold) on the values, for reductions of days
+#   reduction       : reduction to the indicator value, see REDUCTIONS
+#   window          : window in days of a rolling reduction
+#   nan_if_empty    : NaN if there is no data, else the reduction of no values
+PRECIP = 'PrecipPast24hAt06'
+PRECIP_TYPE = 'PrecipTypePast24h'
+TEMPERATURE = 'TemperaturePast24h'
+INDICATORS = {
+    'TAS' : {'parameters' : {'Value' : 'TemperatureMeanPastMonth'}, 'reduction' : 'mean'},
+    'TX' : {'parameters' : {'Value' : 'TemperatureMaxPast24h'}, 'reduction' : 'max'},
+    'TN' : {'parameters' : {'Value' : 'TemperatureMinPast24h'}, 'reduction' : 'min'},
+    'DTR' : {'parameters' : {'Value' : 'TemperatureMaxPast24h', 'Min' : 'TemperatureMinPast24h'},
+             'subtract' : 'Min', 'reduction' : 'max'},
+    'WarmDays' : {'parameters' : {'Value' : 'TemperatureMaxPast24h'}, 'condition' : ('>', 20), 'reduction' : 'count'},
+    'ConWarmDays' : {'parameters' : {'Value' : 'TemperatureMaxPast24h'}, 'condition' : ('>', 20), 'reduction' : 'longest_run'},
+    'ZeroCrossingDays' : {'parameters' : {'Min' : 'TemperatureMinPast24h', 'Value' : 'TemperatureMaxPast24h'},
+                          'where' : [('Min', '<', 0)], 'condition' : ('>', 0), 'reduction' : 'count', 'nan_if_empty' : True},
+    'VegSeasonDayEnd' : {'parameters' : {'Value' : TEMPERATURE}, 'season' : 5, 'reduction' : 'season_end'},
+    'VegSeasonDayStart' : {'parameters' : {'Value' : TEMPERATURE}, 'season' : 5, 'reduction' : 'season_start'},
+    'VegSeasonLentgh' : {'parameters' : {'Value' : TEMPERATURE}, 'season' : 5, 'reduction' : 'season_length'},
+    'FrostDays' : {'parameters' : {'Value' : 'TemperatureMinPast24h'}, 'condition' : ('<', 0), 'reduction' : 'count'},
+    'ColdDays' : {'parameters' : {'Value' : 'TemperatureMaxPast24h'}, 'condition' : ('<', -7), 'reduction' : 'count'},
+    'PR' : {'parameters' : {'Value' : PRECIP}, 'reduction' : 'sum'},
+    'PRRN' : {'parameters' : {'Value' : PRECIP, 'Type' : PRECIP_TYPE}, 'types' : 'Rain', 'reduction' : 'sum'},
+    'PRSN' : {'parameters' : {'Value' : PRECIP, 'Type' : PRECIP_TYPE}, 'types' : 'Snow', 'reduction' : 'sum'},
+    'SuperCooledPR' : {'parameters' : {'Value' : PRECIP, 'Type' : PRECIP_TYPE}, 'types' : 'SuperCooledRain', 'reduction' : 'sum'},
+    'PR7Dmax' : {'parameters' : {'Value' : PRECIP}, 'reduction' : 'rolling_sum_max', 'window' : 7},
+    'PRmax' : {'parameters' : {'Value' : PRECIP}, 'reduction' : 'max'},
+    'PRSNmax' : {'parameters' : {'Value' : PRECIP, 'Type' : PRECIP_TYPE}, 'types' : 'Snow', 'reduction' : 'max'},
+    'PRgt10Days' : {'parameters' : {'Value' : PRECIP}, 'condition' : ('>', 10), 'reduction' : 'count'},
+    'PRgt25Days' : {'parameters' : {'Value' : PRECIP}, 'condition' : ('>', 25), 'reduction' : 'count'},
+    'DryDays' : {'parameters' : {'Value' : PRECIP}, 'condition' : ('<', 1), 'reduction' : 'count', 'nan_if_empty' : True},
+    'LnstDryDays' : {'parameters' : {'Value' : PRECIP}, 'condition' : ('<', 1), 'reduction' : 'longest_run', 'nan_if_empty' : True},
+    'SncDays' : {'parameters' : {'Value' : 'SnowDepthPast24h'}, 'condition' : ('>', 0), 'reduction' : 'count', 'nan_if_empty' : True},
+    'SNWmax' : {'parameters' : {'Value' : 'SnowDepthPast24h'}, 'reduction' : 'max'},
+    'SfcWind' : {'parameters' : {'Value' : 'WindSpeed'}, 'daily' : 'max', 'reduction' : 'max'},
+    'WindGustMax' : {'parameters' : {'Value' : 'WindGust'}, 'daily' : 'max', 'reduction' : 'max'},
+    'WindyDays' : {'parameters' : {'Value' : 'WindGust'}, 'daily' : 'max', 'condition' : ('>', 21), 'reduction' : 'count',
+                   'nan_if_empty' : True},
+    'ColdRainDays' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', .58), ('Temperature', '<', 2)], 'condition' : ('>', 0), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'ColdRainGT10Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', .58), ('Temperature', '<', 2)], 'condition' : ('>', 10), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'ColdRainGT20Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', .58), ('Temperature', '<', 2)], 'condition' : ('>', 20), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'WarmSnowDays' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', -2), ('Temperature', '<', .58)], 'condition' : ('>', 0), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'WarmSnowGT10Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', -2), ('Temperature', '<', .58)], 'condition' : ('>', 10), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'WarmSnowGT20Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE},
+        'where' : [('Temperature', '>', -2), ('Temperature', '<', .58)], 'condition' : ('>', 20), 'reduction' : 'count',
+        'nan_if_empty' : True},
+    'ColdPRRNdays' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Rain', 'where' : [('Temperature', '<', 2)], 'condition' : ('>', 0), 'reduction' : 'count', 'nan_if_empty' : True},
+    'ColdPRRNgt10Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Rain', 'where' : [('Temperature', '<', 2)], 'condition' : ('>', 10), 'reduction' : 'count', 'nan_if_empty' : True},
+    'ColdPRRNgt20Days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Rain', 'where' : [('Temperature', '<', 2)], 'condition' : ('>', 20), 'reduction' : 'count', 'nan_if_empty' : True},
+    'WarmPRSNdays' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Snow', 'where' : [('Temperature', '>', -2)], 'condition' : ('>', 0), 'reduction' : 'count', 'nan_if_empty' : True},
+    'WarmPRSNgt10days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Snow', 'where' : [('Temperature', '>', -2)], 'condition' : ('>', 10), 'reduction' : 'count', 'nan_if_empty' : True},
+    'WarmPRSNgt20days' : {'parameters' : {'Value' : PRECIP, 'Temperature' : TEMPERATURE, 'Type' : PRECIP_TYPE},
+        'types' : 'Snow', 'where' : [('Temperature', '>', -2)], 'condition' : ('>', 20), 'reduction' : 'count', 'nan_if_empty' : True},
+    }
+
+# Comparison operators of the conditions
+OPERATORS = {'>' : operator.gt, '>=' : operator.ge, '<' : operator.lt, '<=' : operator.le, '==' : operator.eq}
+
+# Reductions of the values (or of the condition for reductions of days) to the indicator value
+REDUCTIONS = {
+    'mean' : lambda values, spec: values.mean(),
+    'max' : lambda values, spec: values.max(),
+    'min' : lambda values, spec: values.min(),
+    'sum' : lambda values, spec: values.sum(),
+    'count' : lambda values, spec: values.sum(),
+    'longest_run' : lambda values, spec: helpers.longest_run(values),
+    'rolling_sum_max' : lambda values, spec: values.rolling(spec['window']).sum().max(),
+    'season_start' : lambda season, spec: season[0],
+    'season_end' : lambda season, spec: season[1],
+    'season_length' : lambda season, spec: (season[1] - season[0]).days,
+    }
+
+
+def get_indicator(name):
+    """
+    Returns the function and keyword arguments of an indicator.
+
+    :param name: Indicator name as in list_indicators() (case insensitive). A suffix sets
+                 the temperature of the vegetation season, e.g. 'VegSeasonLentgh-2'.
+    :return: Tuple of (function, keyword arguments).
+    """
+    # Function name and optional temperature suffix
+    function_name, _, suffix = name.partition('-')
+
+    names = {key.lower() : key for key in INDICATORS}
+    if function_name.lower() not in names:
+        raise ValueError(f"Indicator {name} is not implemented")
+    function_name = names[function_name.lower()]
 
-    weather_parameter = 'PrecipPast24hAt06'
-    # Filter based on failure time and time period
-    precip_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
+    kwargs = {}
+    if suffix:
+        kwargs['temperature'] = int(suffix)
+
+    return globals()[function_name], kwargs
+
+
+def get_indicator_names(time_period=None):
+    """
+    Returns the names of the implemented indicators, as in list_indicators().
+    
+    :param time_period: Optional time period ('y', 'm', 's'), to return only the indicators
+                        defined for it (see get_indicator_periods).
+    :return: List of indicator names.
+    """
+    names = []
+    for indicator in helpers.get_indicators():
+        try:
+            get_indicator(indicator['Name'])
+        except ValueError:
+            continue
+        if time_period is None or time_period in get_indicator_periods(indicator['Name']):
+            names.append(indicator['Name'])
+    return names
+
+
+def get_indicator_periods(name):
+    """
+    Returns the time periods of an indicator, from the 'Time period' field of indicators.json.
     
-    weather_parameter = 'PrecipTypePast24h'
-    # Filter based on failure time and time period
-    precip_types = smhi.get_weather_data(weather_parameter, station, ts, time_period)
+    :param name: Indicator name as in list_indicators() (case insensitive). For a vegetation season
+                 temperature not listed, the time periods of the indicator function are used.
+    :return: List of time periods ('m', 's', 'y'), the last one is the default.
+    """
+    periods = {}
+    for indicator in helpers.get_indicators():
+        value = [period.strip() for period in indicator['Time period'].split(',')]
+        periods[indicator['Name'].lower()] = value
+        periods.setdefault(indicator['Name'].partition('-')[0].lower(), value)
+    
+    for key in [name.lower(), name.partition('-')[0].lower()]:
+        if key in periods:
+            return periods[key]
+    raise ValueError(f"Indicator {name} is not listed in indicators.json")
+
 
-    weather_parameter = 'TemperaturePast24h'
-    # Filter based on failure time and time period
-    temperature_values = smhi.get_weather_data(weather_parameter, station, ts, time_period)
+def get_indicator_period(name, time_period=None):
+    """
+    Returns the time period of an indicator, checked against indicators.json (see get_indicator_periods).
     
-    # Add temperture values to the precipitaion values
-    precip_data = precip_values.to_frame().join(temperature_values.rename('Temperature'))
-    # Add precipitaion type
-    precip_data = precip_data.join(precip_types.rename('Type'))
-    # Filter out days with snow
-    valid_types = helpers.get_types('Snow')
-    precip_valid = precip_data.loc[precip_data['Type'].isin(valid_types)].groupby(level=0).first()
+    :param name: Indicator name.
+    :param time_period: Time period ('y', 'm', 's'). If None, the default time period of the indicator.
+    :return: The time period.
+    """
+    periods = get_indicator_periods(name)
+    if time_period is None:
+        return periods[-1]
+    if time_period not in periods:
+        raise ValueError(f"Time period {time_period} is not defined for {name}, use one of {', '.join(periods)}")
+    return time_period
+
+
+def get_indicator_parameters(indicators):
+    """
+    Returns the union of weather parameters needed for a list of indicators.
+
+    :param indicators: List of indicator names.
+    :return: List of weather parameter names, in order of first use.
+    """
+    return plan_indicators(indicators)['parameters']
+
+
+def plan_indicators(indicators):
+    """
+    Plans the computation of several indicators from the registry (see INDICATORS).
+
+    Weather parameters, intermediate inputs (joined frames, valid precipitation types, daily values,
+    vegetation seasons) and reductions that are shared by several indicators appear once in the plan.
+
+    Counts of days above a threshold with the same input and row selection (e.g. the days of
+    cold rain above 0, 10 and 20 mm) are grouped in 'counts' and computed in one pass (see compute_counts).
+
+    :param indicators: List of indicator names (see get_indicator).
+    :return: Dictionary with the 'parameters' to load, the 'inputs', 'counts' and 'reductions' to compute,
+             in order, and the reduction of each indicator in 'indicators'.
+    """
+    plan = {'parameters' : [], 'inputs' : {}, 'counts' : {}, 'reductions' : {}, 'indicators' : {}}
+
+    for name in indicators:
+        function, kwargs = get_indicator(name)
+        spec = dict(INDICATORS[function.__name__])
+        if 'season' in spec and 'temperature' in kwargs:
+            spec['season'] = kwargs['temperature']
+
+        for weather_parameter in spec['parameters'].values():
+            if weather_parameter not in plan['parameters']:
+                plan['parameters'].append(weather_parameter)
+
+        # Chain of inputs, each step keyed by the steps before
+        key = (tuple(spec['parameters'].items()),)
+        plan['inputs'][key] = {'parameters' : spec['parameters']}
+        for step in ['types', 'daily', 'season']:
+            if step in spec:
+                key = key + ((step, spec[step]),)
+                plan['inputs'][key] = {step : spec[step]}
+
+        # Reduction of the input
+        reduction = (key, repr({k : v for k, v in spec.items() if k in ['where', 'subtract', 'condition', 'reduction', 'window', 'nan_if_empty']}))
+        plan['reductions'][reduction] = spec
+        plan['indicators'][name] = reduction
+
+    # Counts above thresholds sharing an input and a row selection
+    for reduction, spec in plan['reductions'].items():
+        if spec['reduction'] != 'count' or spec.get('condition', ('',))[0] != '>' or 'subtract' in spec:
+            continue
+        where = spec.get('where', [])
+        nan_if_empty = spec.get('nan_if_empty', False)
+        group = plan['counts'].setdefault((reduction[0], repr(where), nan_if_empty), {
+            'where' : where, 'nan_if_empty' : nan_if_empty, 'thresholds' : [], 'reductions' : []
+            })
+        group['thresholds'].append(spec['condition'][1])
+        group['reductions'].append(reduction)
+
+    return plan
+
+
+def compute_input(spec, data, source):
+    """
+    Computes an intermediate input of a plan, see plan_indicators.
+
+    :param spec: The input step.
+    :param data: Dictionary of values by weather parameter.
+    :param source: The input of the step before (None for joins).
+    :return: DataFrame with the input, or a tuple (start, end) for vegetation seasons.
+    """
+    if 'parameters' in spec:
+        # Parameters aligned on the dates of the first one
+        values = {column : data[weather_parameter] for column, weather_parameter in spec['parameters'].items()}
+        return helpers.align_values(values, join='left')
+
+    if 'types' in spec:
+        # Days with valid precipitation types, from the daily bitmask of types
+        types = source['Type'].fillna(0).to_numpy().astype(np.int32)
+        return source.loc[types & helpers.get_type_mask(spec['types']) != 0]
+
+    if 'daily' in spec:
+        # Daily values of hourly data
+        return source.resample('1D').agg(spec['daily'])
+
+    if 'season' in spec:
+        return VegSeason(source['Value'], spec['season'])
+
+    raise ValueError(f"Invalid input: {spec}")
+
+
+def compute_reduction(spec, source):
+    """
+    Computes an indicator value from its input, see plan_indicators.
+
+    :param spec: The indicator definition (see INDICATORS).
+    :param source: The input.
+    :return: The indicator value.
+    """
+    if 'season' in spec:
+        return REDUCTIONS[spec['reduction']](source, spec)
+
+    if spec.get('nan_if_empty') and source.size == 0:
+        return float('NaN')
+
+    # Select rows
+    for column, op, threshold in spec.get('where', []):
+        source = source.loc[OPERATORS[op](source[column], threshold)]
+    values = source['Value']
+    if 'subtract' in spec:
+        values = values - source[spec['subtract']]
+
+    # Days fulfilling the condition
+    if 'condition' in spec:
+        op, threshold = spec['condition']
+        values = OPERATORS[op](values, threshold)
+
+    return REDUCTIONS[spec['reduction']](values, spec)
+
+
+def compute_counts(group, source, periods=None):
+    """
+    Computes a group of counts above thresholds from their input in one pass, see plan_indicators.
+
+    :param group: The group of counts, with the row selection ('where') and the 'thresholds'.
+    :param source: The input.
+    :param periods: Optional pd.PeriodIndex to count by period.
+    :return: Dictionary of counts (arrays by period if periods is given) by reduction key.
+    """
+    # Select rows
+    mask = np.ones(len(source), dtype=bool)
+    for column, op, threshold in group['where']:
+        mask &= OPERATORS[op](source[column], threshold).to_numpy()
+
+    if periods is None:
+        counts = helpers.count_exceedances(source['Value'].to_numpy(), group['thresholds'], mask=mask)
+        if group['nan_if_empty'] and source.size == 0:
+            counts = np.full(len(group['thresholds']), float('NaN'))
+        return dict(zip(group['reductions'], counts))
+
+    codes = helpers.get_period_codes(source.index, periods)
+    counts = helpers.count_exceedances(source['Value'].to_numpy(), group['thresholds'], mask=mask,
+                                       groups=codes, n_groups=len(periods)).astype(float)
+    if group['nan_if_empty']:
+        # Periods without rows in the input
+        counts[np.bincount(codes[codes >= 0], minlength=len(periods)) == 0] = float('NaN')
+    return dict(zip(group['reductions'], counts.T))
+
+
+def evaluate_plan(plan, data, periods=None):
+    """
+    Computes the indicators of a plan, each input and reduction once.
+
+    :param plan: The plan (see plan_indicators).
+    :param data: Dictionary of values by weather parameter, for one time period, or for all periods
+                 if periods is given. Indicators with a weather parameter missing in data are NaN.
+    :param periods: Optional pd.PeriodIndex (see helpers.get_periods). The inputs are computed once
+                    for all periods, and the indicators are NaN for periods without data of a weather parameter.
+    :return: Dictionary of indicator values (Series indexed by period if periods is given) by indicator name.
+    """
+    inputs = {}
+    for key, spec in plan['inputs'].items():
+        if any(weather_parameter not in data for _, weather_parameter in key[0]):
+            continue
+        if periods is not None and 'season' in spec:
+            # Vegetation season of each period
+            inputs[key] = [compute_input(spec, data, split) for split in helpers.split_periods(inputs[key[:-1]], periods)]
+        else:
+            inputs[key] = compute_input(spec, data, inputs.get(key[:-1]))
+
+    reductions = {}
+    for key, group in plan['counts'].items():
+        if key[0] in inputs:
+            reductions.update(compute_counts(group, inputs[key[0]], periods))
+
+    for key, spec in plan['reductions'].items():
+        if key in reductions or key[0] not in inputs:
+            continue
+        if periods is None:
+            reductions[key] = compute_reduction(spec, inputs[key[0]])
+        elif 'season' in spec:
+            reductions[key] = [compute_reduction(spec, season) for season in inputs[key[0]]]
+        else:
+            reductions[key] = [compute_reduction(spec, split) for split in helpers.split_periods(inputs[key[0]], periods)]
+
+    if periods is None:
+        return {name : reductions.get(key, float('NaN')) for name, key in plan['indicators'].items()}
+
+    # Periods without data by weather parameter
+    empty = {}
+    for weather_parameter, values in data.items():
+        codes = helpers.get_period_codes(values.index, periods)
+        empty[weather_parameter] = np.bincount(codes[codes >= 0], minlength=len(periods)) == 0
+
+    results = {}
+    for name, key in plan['indicators'].items():
+        if key not in reductions:
+            results[name] = pd.Series(float('NaN'), index=periods, name=name)
+            continue
+        values = pd.Series(reductions[key], index=periods, name=name)
+        missing = np.zeros(len(periods), dtype=bool)
+        for _, weather_parameter in key[0][0]:
+            missing |= empty[weather_parameter]
+        results[name] = values.mask(missing)
+
+    return results
+
+
+def evaluate_indicator(name, station, ts, time_period, data=None, **kwargs):
+    """
+    Computes an indicator from the registry for a station and time period.
+
+    :param name: Indicator name.
+    :param station: The station ID or name.
+    :param ts: Timestamp, or tuple (start, end) of timestamps for values of every month, season or
+               year in the range (see helpers.get_periods).
+    :param time_period: Time period ('y', 'm', 's').
+    :param data: Optional dictionary of preloaded values by weather parameter (see get_weather_data),
+                 over the range for a tuple of timestamps.
+    :param kwargs: Keyword arguments of the indicator (temperature of the vegetation season).
+    :return: The indicator value, or Series of values indexed by period for a tuple of timestamps.
+    """
+    function_name = name
+    if 'temperature' in kwargs:
+        name = '{0}-{1}'.format(name, kwargs['temperature'])
+    plan = plan_indicators([name])
+
+    # Values over the periods covering a range of timestamps
+    periods = None
+    if isinstance(ts, (list, tuple)):
+        periods = helpers.get_periods(ts, time_period)
+        ts, time_period = (periods[0].start_time, periods[-1].end_time), None
+
+    values = {
+        weather_parameter : get_weather_data(weather_parameter, station, ts, time_period, data)
+        for weather_parameter in plan['parameters']
+        }
+
+    result = evaluate_plan(plan, values, periods)[name]
+    if periods is None:
+        return result
+    return result.rename(function_name)
+
+
+# %% Multiple indicators
+
+def load_weather_data(station, weather_parameters, ts, time_periods=('y',), errors='raise'):
+    """
+    Loads the data for several weather parameters of a station, each parameter downloaded once.
     
-    # Number of days of rain given temperature interval
-    if precip_valid.size>0:
-        temperature_threshold = -2
-        i_temperature = precip_valid['Temperature']>temperature_threshold
-        precip_threshold = 20
-        value = (precip_valid.loc[i_temperature,'Value']>precip_threshold).sum()
-    else:
-        value = float('NaN')
+    :param station: The station ID or name.
+    :param weather_parameters: List of weather parameter names.
+    :param ts: Timestamp or tuple (start, end) of timestamps.
+    :param time_periods: Time periods ('y', 'm', 's') the data must cover.
+    :param errors: 'raise' or 'coerce'. Download errors are always raised. Data of a parameter
+                   that can not be loaded (a ValueError, e.g. an unknown layout) is raised,
+                   or with 'coerce' the parameter is None and a warning is issued.
+    :return: Dictionary of DataFrames (see smhi.get_data) by weather parameter,
+             None for parameters not available for the station (not in the station catalog).
+    """
+    # Time range covering all time periods
+    ranges = [helpers.get_period_range(ts, time_period) for time_period in time_periods]
+    ts_range = (min(r[0] for r in ranges), max(r[-1] for r in ranges))
+    
+    data = {}
+    for weather_parameter in weather_parameters:
+        # Only parameters missing from the station catalog have no data
+        if smhi.get_station_updated(weather_parameter, station) is None:
+            data[weather_parameter] = None
+            continue
+        try:
+            data[weather_parameter] = smhi.get_data(weather_parameter, station, ts=ts_range)
+        except ValueError as e:
+            # Invalid JSON in a response is a download error
+            if errors != 'coerce' or isinstance(e, helpers.requests.RequestException):
+                raise
+            warnings.warn(f"{weather_parameter} at station {station} could not be loaded: {e}")
+            data[weather_parameter] = None
+    
+    return data
+
+
+def compute_indicators(station, ts, time_period=None, indicators=None, errors='raise'):
+    """
+    Computes several indicators for a station from shared data.
+    
+    The union of the weather parameters needed by the indicators is loaded once (see load_weather_data).
+    The values for each time period are selected once, and the indicators of a time period are 
+    computed together from a plan (see plan_indicators), sharing joins and reductions.
+    
+    :param station: The station ID or name.
+    :param ts: Timestamp, or tuple (start, end) of timestamps for values by period (see evaluate_indicator).
+    :param time_period: Time period ('y', 'm', 's') for all indicators, it must be listed for each
+                        indicator in indicators.json (see get_indicator_period). If None, the default
+                        time period of each indicator is used (not for a range of timestamps).
+    :param indicators: List of indicator names (see list_indicators). If None, all implemented indicators
+                       defined for the time period.
+    :param errors: 'raise' or 'coerce', with 'coerce' the indicators of a weather parameter that can
+                   not be loaded are missing (see load_weather_data).
+    :return: DataFrame with one column per indicator, with one row indexed by station, or for
+             a range of timestamps one row per period.
+    """
+    series_mode = isinstance(ts, (list, tuple))
+    if series_mode and time_period is None:
+        raise ValueError("A time period is required for a range of timestamps")
+    
+    if indicators is None:
+        indicators = get_indicator_names(time_period)
+    
+    # Indicators by time period
+    tasks = {}
+    for name in indicators:
+        tasks.setdefault(get_indicator_period(name, time_period), []).append(name)
+    
+    # Load each weather parameter once
+    data = load_weather_data(station, get_indicator_parameters(indicators), ts, list(tasks), errors=errors)
+    
+    values = {}
+    for period, names in tasks.items():
+        plan = plan_indicators(names)
+        
+        # Values of each weather parameter selected once for the time period
+        ts_period = helpers.get_period_range(ts, period)
+        period_data = {
+            weather_parameter : smhi.select_values(data[weather_parameter], weather_parameter, ts=ts_period)
+            for weather_parameter in plan['parameters'] if data[weather_parameter] is not None
+            }
+        
+        if series_mode:
+            # Indicators of every period, computed together over the range
+            periods = helpers.get_periods(ts, period)
+            values.update(evaluate_plan(plan, period_data, periods))
+        else:
+            values.update(evaluate_plan(plan, period_data))
+    
+    if series_mode:
+        return pd.DataFrame(values)[indicators]
+    # One row, each column with the type of its values (dates of the vegetation season)
+    return pd.DataFrame([values], index=pd.Index([station], name='Station'))[indicators]
+
+
+# %% Aggregate index
+
+# Reductions answered from an aggregate index (see helpers.build_aggregate_index)
+AGGREGATE_REDUCTIONS = ['mean', 'max', 'min', 'sum', 'count']
+
+
+def get_aggregate_indicators():
+    """
+    Returns the indicators that are reductions of one weather parameter over a time window,
+    which can be computed for any window from an aggregate index (see query_indicator).
+    
+    :return: List of indicator names.
+    """
+    return [
+        name for name, spec in INDICATORS.items()
+        if len(spec['parameters']) == 1 and spec['reduction'] in AGGREGATE_REDUCTIONS
+        and not any(step in spec for step in ['types', 'daily', 'season', 'where', 'subtract', 'window'])
+        ]
+
 
-    return value
\ No newline at end of file
+def get_aggregate_index(weather_parameter, station):
+    """
+    Returns the aggregate index of the values of a weather parameter at a station (see helpers.build_aggregate_index),
+    with prefix counts of the conditions of the indicators of the parameter.
+    
+    The index is built once from the full series and kept in memory (AGGREGATE_INDEX_SIZE) 
+    until SMHI updates the station.
+    
+    :param weather_parameter: The weather parameter name.
+    :param station: The station ID or name.
+    :return: The aggregate index.
+    """
+    station_id = smhi.get_station_value(station)
+    key = (weather_parameter, station_id)
+    version = smhi.get_station_updated(weather_parameter, station_id)
+    
+    entry = _aggregate_indexes.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        _aggregate_indexes.move_to_end(key)
+        return entry[1]
+    
+    values = smhi.get_weather_data(weather_parameter, station_id)
+    
+    # Days fulfilling the condition of each indicator
+    conditions = {}
+    for name in get_aggregate_indicators():
+        spec = INDICATORS[name]
+        if spec['parameters']['Value'] == weather_parameter and 'condition' in spec:
+            op, threshold = spec['condition']
+            conditions[spec['condition']] = OPERATORS[op](values, threshold).to_numpy()
+    
+    index = helpers.build_aggregate_index(values, conditions)
+    
+    if version is not None and AGGREGATE_INDEX_SIZE > 0:
+        _aggregate_indexes[key] = (version, index)
+        _aggregate_indexes.move_to_end(key)
+        while len(_aggregate_indexes) > AGGREGATE_INDEX_SIZE:
+            _aggregate_indexes.popitem(last=False)
+    
+    return index
+
+
+def query_indicator(name, station, ts, time_period=None):
+    """
+    Computes an indicator for any time window from the aggregate index of its weather parameter
+    (see get_aggregate_index), without selecting and scanning the values.
+    
+    :param name: Indicator name (see get_aggregate_indicators).
+    :param station: The station ID or name.
+    :param ts: Tuple (start, end) of timestamps (both included), or a timestamp with a time period.
+    :param time_period: Optional time period ('y', 'm', 's') of a timestamp.
+    :return: The indicator value.
+    """
+    function, _ = get_indicator(name)
+    if function.__name__ not in get_aggregate_indicators():
+        raise ValueError(f"Indicator {name} can not be computed from an aggregate index")
+    spec = INDICATORS[function.__name__]
+    
+    # Time window
+    if time_period is not None:
+        start, end = helpers.get_time_range(pd.Timestamp(ts), time_period)
+    elif isinstance(ts, (list, tuple)):
+        start, end = pd.Timestamp(ts[0]), pd.Timestamp(ts[-1])
+    else:
+        start = end = pd.Timestamp(ts)
+    
+    index = get_aggregate_index(spec['parameters']['Value'], station)
+    
+    if spec.get('nan_if_empty') and helpers.query_aggregate_index(index, start, end, 'rows') == 0:
+        return float('NaN')
+    if 'condition' in spec:
+        return helpers.query_aggregate_index(index, start, end, 'count', condition=spec['condition'])
+    return helpers.query_aggregate_index(index, start, end, spec['reduction'])
@@ -1,10 +1,57 @@
+import contextlib
 import datetime
-# import sys
+import sys
 # import logging
+import importlib.util
+import io
 import json
-import requests
-import pandas as pd
-import csv
+import os
+import threading
+
+
+def lazy_import(name):
+    """
+    Import a module lazily, the module is loaded on first attribute access.
+    Keeps the import of this package fast (pandas, numpy and requests are only loaded when used).
+    Only for top-level third-party packages: a lazy submodule is not bound on its parent package,
+    and a lazy standard library module would be shared with the code importing it (e.g. asyncio),
+    import those normally or locally in the function using them.
+    
+    :param name: The name of the top-level package.
+    :return: The (lazy) module.
+    """
+    if '.' in name or name in sys.stdlib_module_names:
+        raise ValueError(f"Only top-level third-party packages can be imported lazily, not {name}.")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def load_lazy(module):
+    """
+    Loads a lazily imported module (see lazy_import) now, e.g. before several threads use it.
+    
+    :param module: The (lazy) module.
+    :return: The loaded module.
+    """
+    # Any attribute access executes a lazy module
+    getattr(module, '__name__')
+    return module
+
+
+requests = lazy_import('requests')
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+# Directory of the package resources (parameters.json, indicators.json)
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 climate_weather_parameters = {
@@ -25,10 +72,122 @@ climate_weather_parameters = {
     }
 climate_weather_parameters['combination'] = climate_weather_parameters['temperature'] + climate_weather_parameters['precipitation']
 
+# Pandas period frequencies of the time periods, seasons are quarters starting in December
+PERIOD_FREQUENCIES = {'month' : 'M', 'season' : 'Q-NOV', 'year' : 'Y'}
+
+# HTTP session settings, see configure_session
+session_config = {
+    'pool_size' : 10,          # pooled keep-alive connections per host
+    'timeout' : (10, 120),     # (connect, read) timeout in seconds per request
+    'max_retries' : 2,         # retries on connection errors
+    'headers' : {'Accept-Encoding' : 'gzip, deflate'}
+    }
+
+_session = None
+_session_pid = None
+
+# Sessions used instead of the shared session by a thread, see use_session
+_thread_sessions = threading.local()
+
+# Parameter lookup tables, see get_parameter_registry
+_parameter_registry = None
+
+# Package resources, loaded once, see load_resource
+_resources = {}
+
 # functions
+def configure_session(pool_size=None, timeout=None, max_retries=None, headers=None):
+    """
+    Configure the shared HTTP session used for all calls to the SMHI API.
+    The session is recreated with the new settings on the next request.
+    
+    :param pool_size: Number of keep-alive connections to pool per host.
+    :param timeout: Timeout in seconds per request, a number or a (connect, read) tuple.
+    :param max_retries: Number of retries on failed connections.
+    :param headers: Extra headers to send with every request.
+    """
+    global _session
+    if pool_size is not None:
+        session_config['pool_size'] = pool_size
+    if timeout is not None:
+        session_config['timeout'] = timeout
+    if max_retries is not None:
+        session_config['max_retries'] = max_retries
+    if headers is not None:
+        session_config['headers'].update(headers)
+    
+    if _session is not None:
+        _session.close()
+    _session = None
+
+
+def create_session(pool_size=None):
+    """
+    Creates an HTTP session with the settings of the shared session (see configure_session).
+    
+    :param pool_size: Number of keep-alive connections to pool per host (defaults to the setting).
+    :return: The new session.
+    """
+    if pool_size is None:
+        pool_size = session_config['pool_size']
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=session_config['max_retries']
+        )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(session_config['headers'])
+    return session
+
+
+def get_session():
+    """
+    Returns the HTTP session of the current thread if set (see use_session), else the shared
+    HTTP session (created on first use, and again in forked processes).
+    """
+    global _session, _session_pid
+    session = getattr(_thread_sessions, 'session', None)
+    if session is not None:
+        return session
+    if _session is None or _session_pid != os.getpid():
+        _session = create_session()
+        _session_pid = os.getpid()
+    return _session
+
+
+@contextlib.contextmanager
+def use_session(session):
+    """
+    Makes the current thread send its requests with a session instead of the shared session
+    (see get_session), e.g. a session with a larger connection pool.
+    
+    :param session: The session to use in the with block.
+    """
+    previous = getattr(_thread_sessions, 'session', None)
+    _thread_sessions.session = session
+    try:
+        yield session
+    finally:
+        _thread_sessions.session = previous
+
+
+def http_get(adr, **kwargs):
+    """
+    Send a GET request using the shared session and the configured timeout.
+    
+    :param adr: The URL to request.
+    :param kwargs: Extra arguments passed to requests.Session.get.
+    :return: The response object.
+    """
+    kwargs.setdefault('timeout', session_config['timeout'])
+    return get_session().get(adr, **kwargs)
+
+
 def api_return_data(adr):
     # initiate the call
-    req_obj = requests.get(adr)
+    req_obj = http_get(adr)
     # try to get the json data (exceptions will be catched later)
     json_data = req_obj.json()
     return json_data
@@ -63,6 +222,18 @@ def validatestring(inputStr, validStrings, only_forward=False):
      
     return outputStrings.pop()
 
+def latlon_to_xyz(latitude, longitude):
+    """
+    Convert positions in decimal degrees to unit vectors on the sphere.
+    
+    :param latitude: Array of latitudes in decimal degrees.
+    :param longitude: Array of longitudes in decimal degrees.
+    :return: Array (n x 3) of unit vectors.
+    """
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
 def get_season(ts):
     # Define month for the seasons
     s1 = [12, 1, 2]
@@ -99,43 +270,6 @@ def get_climate_parameters(parameter_type='all'):
     return list(set(parameters))  # Return unique parameters
 
 
-def get_filter(ts, time_period):
-    """
-    Returns the time range in ISO format to be used for filtering a DataFrame's time index.
-    For 'year', 'month', and 'season', returns a simplified filter like '2024', '2024-09', or a seasonal range.
-
-    Parameters:
-    - ts: A tuple containing the start and end timestamps (already processed).
-    - time_period: The period for which the range should be formatted ('d', 'w', 'm', 's', 'y') or ('day', 'week', 'month', 'season', 'year').
-
-    Returns:
-    - time_filter: A single string or tuple of (start_time_iso, end_time_iso) in ISO format.
-    """
-
-    # Shorthand for 'day', 'week', 'month', 'season', 'year'
-    shorthand_map = {'d': 'day', 'w': 'week', 'm': 'month', 's': 'season', 'y': 'year'}
-    
-    # Map the shorthand to the full word
-    if time_period in shorthand_map:
-        time_period = shorthand_map[time_period]
-
-    # For 'year', return just the year
-    if time_period == 'year':
-        return (str(ts[0].year),)
-    
-    # For 'month', return just the year and month
-    if time_period == 'month':
-        return (ts[0].strftime('%Y-%m'),)
-    
-    # For 'day', return the full date
-    if time_period == 'day':
-        return (ts[0].strftime('%Y-%m-%d'),)
-
-    # For 'season' or other ranges, return the range in ISO format
-    return (ts[0].isoformat(), ts[1].isoformat()) if len(ts) > 1 else (ts[0].isoformat(),)
-
-
-
 def get_time_range(ts, time_period):
     """
     Returns the start and end of a date range based on the provided time period and timestamp.
@@ -190,10 +324,13 @@ def get_time_range(ts, time_period):
     elif time_period == 'season':
         m = get_season(ts)
         if 12 in m:
-            start_ts = ts.replace(year=ts.year - 1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
+            # December belongs to the winter of the next year
+            year = ts.year + 1 if ts.month == 12 else ts.year
+            start_ts = ts.replace(year=year - 1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
+            end_ts = ts.replace(year=year, month=m[-1], day=1) + pd.DateOffset(months=1) - pd.Timedelta(microseconds=1)
         else:
             start_ts = ts.replace(month=m[0], day=1, hour=0, minute=0, second=0, microsecond=0)
-        end_ts = ts.replace(month=m[-1], day=1) + pd.DateOffset(months=1) - pd.Timedelta(microseconds=1)
+            end_ts = ts.replace(month=m[-1], day=1) + pd.DateOffset(months=1) - pd.Timedelta(microseconds=1)
 
     elif time_period == 'year':
         start_ts = ts.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -206,57 +343,217 @@ def get_time_range(ts, time_period):
 
 
 
+# Precipitation types of SMHI (parameter PrecipTypePast24h), each type is a bit of the daily type mask
+PRECIPITATION_TYPES = ['snowfall',
+                       'regn',
+                       'duggregn',
+                       'regnskurar',
+                       'kornsnö',
+                       'snöblandat regn',
+                       'snöbyar',
+                       'Obestämd nederbördstyp',
+                       'isnålar',
+                       'underkyld nederbörd',
+                       'iskorn',
+                       'småhagel',
+                       'byar av snöblandat regn',
+                       'snöhagel',
+                       'ishagel']
+
+# Precipitation types by category
+PRECIPITATION_CATEGORIES = {
+    'rain' : ['regn', 'duggregn', 'regnskurar'],
+    'snow' : ['snowfall', 'kornsnö', 'snöbyar', 'snöhagel'],
+    'snowslush' : ['snöblandat regn', 'byar av snöblandat regn'],
+    'supercooledrain' : ['underkyld nederbörd']
+    }
+
+
 def get_types(cat):
-    PrecitipationTypes = ['snowfall',
-                'regn',
-                'duggregn',
-                'regnskurar',
-                'kornsnö',
-                'snöblandat regn',
-                'snöbyar',
-                'Obestämd nederbördstyp',
-                'isnålar',
-                'underkyld nederbörd',
-                'iskorn',
-                'småhagel',
-                'byar av snöblandat regn',
-                'snöhagel',
-                'ishagel']
-    
-    if cat.lower()=='rain':
-        return ['regn', 'duggregn', 'regnskurar']
-    elif cat.lower()=='snow':
-        return ['snowfall', 'kornsnö', 'snöbyar', 'snöhagel']
-    elif cat.lower()=='snowslush':
-        return ['snöblandat regn', 'byar av snöblandat regn']
-    elif cat.lower()=='supercooledrain':
-        return ['underkyld nederbörd']
-    else: 
-        return []
-    
-def download_and_parse_csv(adr_full, delimiter=';', usecols=None):
-    response = requests.get(adr_full).text
-    lines = response.splitlines()
-    
-    # Find header row
-    header_row = 8
-    for k, line in enumerate(lines):
-        if k >= header_row and 'Datum' in line:
-            header_row = k
-            break
+    # Precipitation types of a category ('rain', 'snow', 'snowslush', 'supercooledrain')
+    return list(PRECIPITATION_CATEGORIES.get(cat.lower(), []))
+
+
+def get_type_mask(cat):
+    """
+    Returns the bitmask of the precipitation types of a category, see encode_types.
+    
+    Parameters:
+    - cat: Category ('rain', 'snow', 'snowslush', 'supercooledrain').
     
-    skip_rows = header_row + 1
-    cols = lines[header_row].split(delimiter)
+    Returns:
+    - Integer with the bits of the precipitation types of the category set.
+    """
+    mask = 0
+    for precipitation_type in get_types(cat):
+        mask |= 1 << PRECIPITATION_TYPES.index(precipitation_type)
+    return mask
+
+
+def encode_types(values, days):
+    """
+    Encodes precipitation types as one bitmask per day, several types on a day set several bits.
     
-    # Filter columns if usecols is specified
-    if usecols is not None:
-        cols = [col for k, col in enumerate(cols) if k in usecols or col in usecols]
+    Parameters:
+    - values: Array of precipitation type names (see PRECIPITATION_TYPES), unknown names have no bit.
+    - days: Array with the day of each value.
+    
+    Returns:
+    - Array of bitmasks (int32) of the unique days, in sorted order of the days (missing days excluded).
+    """
+    codes = pd.Categorical(values, categories=PRECIPITATION_TYPES).codes
+    bits = np.where(codes >= 0, np.left_shift(1, codes.astype(np.int32)), 0).astype(np.int32)
+    
+    # Bitwise or of the types of each day
+    day_codes, unique_days = pd.factorize(days, sort=True)
+    masks = np.zeros(len(unique_days), dtype=np.int32)
+    np.bitwise_or.at(masks, day_codes[day_codes >= 0], bits[day_codes >= 0])
+    return masks
+
+
+def decode_types(mask):
+    """
+    Returns the names of the precipitation types in a bitmask, see encode_types.
+    """
+    return [precipitation_type for i, precipitation_type in enumerate(PRECIPITATION_TYPES) if int(mask) >> i & 1]
+
+
+def download_and_parse_csv(adr_full, delimiter=';', usecols=None, dtype=None):
+    """
+    Download a CSV file from the SMHI API and parse it into a DataFrame.
+    
+    The response is streamed: the metadata rows before the header row are read line by line
+    and the data rows are then parsed directly into typed columns by the pandas C parser.
+    
+    :param adr_full: The URL of the CSV file.
+    :param delimiter: The delimiter used in the file.
+    :param usecols: Column indices or names to keep.
+    :param dtype: Dictionary of column index or name and type. Columns of type 'numeric' are
+                  parsed as numbers, all other columns are kept as strings.
+    :return: DataFrame with the data rows.
+    """
+    with http_get(adr_full, stream=True) as response:
+        response.raw.decode_content = True
+        response.raw.auto_close = False
+        stream = io.TextIOWrapper(response.raw, encoding=response.encoding or 'utf-8', newline='')
+        
+        # Find header row
+        header_row = 8
+        lines = []
+        header = None
+        for k, line in enumerate(stream):
+            if k >= header_row and 'Datum' in line:
+                header = line
+                break
+            lines.append(line)
+        
+        if header is None:
+            # No header found, use the default header row
+            header = lines[header_row]
+            data = io.StringIO(''.join(lines[header_row + 1:]))
+        else:
+            # Data rows follow directly after the header row
+            data = stream
+        
+        cols = header.rstrip('\r\n').split(delimiter)
+        
+        # Filter columns if usecols is specified
+        col_idx = [k for k, col in enumerate(cols) if usecols is None or k in usecols or col in usecols]
+        
+        # Columns to parse as numbers (keys are positions among the used columns or names)
+        numeric_idx = set()
+        if isinstance(dtype, dict):
+            for key, ty in dtype.items():
+                if ty == 'numeric':
+                    numeric_idx.add(col_idx[key] if isinstance(key, int) else cols.index(key))
+        
+        # All columns are named by position since the trailing metadata columns only
+        # exist on the first rows (and names may be empty or duplicated)
+        df = pd.read_csv(
+            data,
+            sep=delimiter,
+            header=None,
+            names=range(len(cols)),
+            dtype={k: str for k in range(len(cols)) if k not in numeric_idx},
+            engine='c'
+            )
     
-    d = csv.DictReader(lines[skip_rows:], delimiter=delimiter, fieldnames=cols)
-    df = pd.DataFrame(data=list(d), columns=cols)
+    df = df[col_idx]
+    df.columns = [cols[k] for k in col_idx]
     
     return df
 
+# Formats of the dates in SMHI data by length of the date strings, parsed without format inference
+DATE_FORMATS = {
+    7 : '%Y-%m',
+    10 : '%Y-%m-%d',
+    19 : '%Y-%m-%d %H:%M:%S'
+    }
+
+
+def parse_datetime(values, date_format=None, errors='raise'):
+    """
+    Parses date strings with a known format.
+    
+    Parameters:
+    - values: Series of date strings (or datetimes, returned as they are).
+    - date_format: The format, if None it is looked up in DATE_FORMATS by the length of the
+                   first date (formats of other lengths are inferred by pandas).
+    - errors: 'raise' or 'coerce' (invalid dates are NaT).
+    
+    Returns:
+    - Series of datetime64.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if date_format is None:
+        first = values.dropna()
+        if not first.empty:
+            date_format = DATE_FORMATS.get(len(str(first.iloc[0])))
+    return pd.to_datetime(values, format=date_format, errors=errors, cache=True)
+
+
+def parse_date_time(dates, times):
+    """
+    Builds timestamps from date strings ('%Y-%m-%d') and time strings ('%H:%M:%S').
+    
+    Each unique date and each unique time of day (24 in hourly data) is parsed once, and the
+    timestamps are the sums of the days and times, instead of joining the strings and parsing
+    every timestamp.
+    
+    Parameters:
+    - dates: Series of date strings.
+    - times: Series of time strings.
+    
+    Returns:
+    - Series of datetime64 (NaT for missing dates or times).
+    """
+    date_codes, unique_dates = pd.factorize(dates)
+    time_codes, unique_times = pd.factorize(times)
+    days = parse_datetime(pd.Series(unique_dates, dtype=object), DATE_FORMATS[10]).to_numpy()
+    offsets = pd.to_timedelta(pd.Series(unique_times, dtype=object), errors='coerce').to_numpy()
+    
+    # Missing dates or times at the end
+    days = np.append(days, np.datetime64('NaT'))
+    offsets = np.append(offsets, np.timedelta64('NaT'))
+    timestamps = days[date_codes] + offsets[time_codes]
+    return pd.Series(timestamps, index=dates.index)
+
+
+def parse_epoch_ms(values):
+    """
+    Converts epoch milliseconds (as in the JSON data of the SMHI API) to datetimes, exactly as integers.
+    
+    Parameters:
+    - values: Series of epoch milliseconds, possibly with missing values.
+    
+    Returns:
+    - Series of datetime64, NaT for missing values.
+    """
+    # Nullable integers, missing values (None or NaN) become NaT
+    return pd.to_datetime(values.astype('Int64'), unit='ms')
+
+
 def parse_dates_columns(df, parse_dates, keep_date_col=True):
     """
     Parse date columns in the DataFrame.
@@ -283,16 +580,16 @@ def parse_dates_columns(df, parse_dates, keep_date_col=True):
 
         # If it's numeric, translate indices to column names
         if isinstance(parse_date, list):
-            # Handle list of column indices/names for concatenating
+            # Handle list of column indices/names for a date and a time column
             parse_date = [df.columns[col] if isinstance(col, int) else col for col in parse_date]
-            s = pd.to_datetime(df[parse_date[0]].str.cat(df[parse_date[1]], sep=' '))
+            s = parse_date_time(df[parse_date[0]], df[parse_date[1]])
         elif isinstance(parse_date, int):
             # Handle individual numeric index
             col_name = df.columns[parse_date]
-            s = pd.to_datetime(df[col_name])
+            s = parse_datetime(df[col_name])
         else:
             # Handle column name or list of names
-            s = pd.to_datetime(df[parse_date])
+            s = parse_datetime(df[parse_date])
 
         # Insert the parsed date into the DataFrame
         df[result] = s
@@ -336,6 +633,7 @@ def rename_columns_to_english(df, k_value, translate=True):
         'Från Datum Tid (UTC)': 'From Date (UTC)',
         'Till Datum Tid (UTC)': 'To Date (UTC)',
         'Representativt dygn': 'Date',
+        'Representativ månad': 'Date',
         'Datum (UTC)': 'Date (UTC)',
         'Datum': 'Date',
         'Kvalitet': 'Quality'
@@ -347,7 +645,7 @@ def rename_columns_to_english(df, k_value, translate=True):
 
 def read_csv(adr_full, delimiter=';', usecols=None, parse_dates=None, keep_date_col=True, dtype=None):
     # Download and parse CSV
-    df = download_and_parse_csv(adr_full, delimiter=delimiter, usecols=usecols)
+    df = download_and_parse_csv(adr_full, delimiter=delimiter, usecols=usecols, dtype=dtype)
     
     # Parse date columns if specified
     if parse_dates is not None:
@@ -398,63 +696,391 @@ def format_ts(ts, isoformat=False, time_period=None):
     return ts
 
 
+def get_period_range(ts, time_period):
+    """
+    Returns the start and end of the full time periods covering a timestamp or range of timestamps.
+    
+    Parameters:
+    - ts: The timestamp or a tuple (start, end) of timestamps.
+    - time_period: The time period ('m', 's', 'y').
+    
+    Returns:
+    - A tuple (start_ts, end_ts) of pd.Timestamp objects.
+    """
+    ts = format_ts(ts)
+    return get_time_range(ts[0], time_period)[0], get_time_range(ts[-1], time_period)[1]
+
+
+def get_periods(ts, time_period):
+    """
+    Returns the months, seasons or years covering a timestamp or range of timestamps.
+    Seasons are quarters of years starting in December (see get_season), 
+    e.g. 2020Q1 is the winter from December 2019 to February 2020.
+    
+    Parameters:
+    - ts: The timestamp or a tuple (start, end) of timestamps.
+    - time_period: The time period ('m', 's', 'y') or ('month', 'season', 'year').
+    
+    Returns:
+    - pd.PeriodIndex with one period per month, season or year.
+    """
+    # Shorthand for 'month', 'season', 'year'
+    shorthand_map = {'m': 'month', 's': 'season', 'y': 'year'}
+    time_period = shorthand_map.get(time_period, time_period)
+    if time_period not in PERIOD_FREQUENCIES:
+        raise ValueError(f"Invalid time period: {time_period}")
+    
+    start_ts, end_ts = get_period_range(ts, time_period)
+    return pd.period_range(start_ts, end_ts, freq=PERIOD_FREQUENCIES[time_period])
+
 
-def query_time_range(df, ts, idx):
+def split_periods(values, periods):
     """
-    Constructs and applies a query for time ranges when direct timestamp lookup fails.
+    Splits time sorted data into periods, by binary search of the period boundaries.
+    
+    Parameters:
+    - values: Series or DataFrame with a sorted DatetimeIndex.
+    - periods: pd.PeriodIndex (see get_periods).
+    
+    Returns:
+    - List with the values of each period.
     """
-    i1 = df.columns.str.startswith('From Date')
-    i2 = df.columns.str.startswith('To Date')
+    starts = values.index.searchsorted(periods.start_time, side='left')
+    ends = values.index.searchsorted(periods.end_time, side='right')
+    return [values.iloc[start:end] for start, end in zip(starts, ends)]
 
-    if i1.any() and i2.any():
-        idx1 = df.columns[i1.argmax()]
-        idx2 = df.columns[i2.argmax()]
 
-        if len(ts) == 1:
-            qrstr = "`{0}` <= '{2}' and `{1}` >= '{2}'".format(idx1, idx2, ts[0])
-        else:
-            qrstr = "`{0}` <= '{1}' and `{2}` >= '{3}'".format(idx1, ts[0], idx2, ts[1])
-    elif len(ts) == 1:
-        qrstr = "{0} == '{1}'".format(idx, ts[0])
+def get_period_codes(index, periods):
+    """
+    Returns the number of the period of each timestamp, for grouping data by period.
+
+    Parameters:
+    - index: DatetimeIndex.
+    - periods: pd.PeriodIndex (see get_periods).
+
+    Returns:
+    - Array with the position in periods of each timestamp, -1 outside the periods.
+    """
+    return periods.get_indexer(index.to_period(periods.freq))
+
+
+def count_exceedances(values, thresholds, mask=None, groups=None, n_groups=1):
+    """
+    Counts the values above each of several thresholds in one pass over the data,
+    e.g. the days with more than 0, 10 and 20 mm of precipitation in every year.
+
+    Parameters:
+    - values: Array of values (NaN is never counted).
+    - thresholds: List of thresholds, a value is counted if it is above the threshold.
+    - mask: Optional boolean array, only the values where the mask is True are counted
+            (e.g. a temperature band).
+    - groups: Optional array with the group number (0 to n_groups-1, -1 for none) of each value,
+              e.g. from get_period_codes.
+    - n_groups: Number of groups.
+
+    Returns:
+    - Array of counts (n_groups x n_thresholds), or (n_thresholds,) without groups.
+    """
+    values = np.asarray(values, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    n_thresholds = thresholds.size
+
+    # Number of (sorted) thresholds below each value
+    order = np.argsort(thresholds)
+    below = np.searchsorted(thresholds[order], values, side='left')
+
+    valid = ~np.isnan(values)
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)
+    if groups is None:
+        codes = np.zeros(values.size, dtype=int)
     else:
-        qrstr = "`{0}` >= '{1}' and `{0}` <= '{2}'".format(idx, ts[0], ts[1])
+        codes = np.asarray(groups)
+        valid &= codes >= 0
+
+    # Histogram of the number of thresholds below by group, counts are the reverse cumulative sums
+    bins = np.bincount(codes[valid] * (n_thresholds + 1) + below[valid], minlength=n_groups * (n_thresholds + 1))
+    bins = bins.reshape(n_groups, n_thresholds + 1)
+    counts_sorted = bins[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+
+    counts = np.empty_like(counts_sorted)
+    counts[:, order] = counts_sorted
+    return counts if groups is not None else counts[0]
+
+
+def build_aggregate_index(values, conditions=None):
+    """
+    Builds an index of a series for sums, means, counts, minima and maxima over any time window,
+    see query_aggregate_index.
+    
+    Prefix sums and counts answer sums, means and counts in constant time, and sparse tables
+    (minima and maxima of every window of 2^k values) answer minima and maxima in constant time.
+    Locating the window in the dates takes logarithmic time.
+    
+    Parameters:
+    - values: Series with a sorted DatetimeIndex.
+    - conditions: Optional dictionary of boolean arrays by name (e.g. values above a threshold),
+                  counted with prefix counts.
+    
+    Returns:
+    - Dictionary with the 'dates' and the prefix arrays and sparse tables.
+    """
+    x = values.to_numpy(dtype=float)
+    valid = ~np.isnan(x)
+    
+    def prefix(a):
+        # Prefix sums with a leading zero, the sum of a[i:j] is p[j] - p[i]
+        return np.concatenate(([0], np.cumsum(a)))
+    
+    def sparse_table(a, function):
+        table = [a]
+        width = 1
+        while 2 * width <= a.size:
+            table.append(function(table[-1][:-width], table[-1][width:]))
+            width *= 2
+        return table
+    
+    return {
+        'dates' : values.index.to_numpy(),
+        'sum' : prefix(np.where(valid, x, 0)),
+        'count' : prefix(valid.astype(np.int64)),
+        'conditions' : {name : prefix(np.asarray(condition, dtype=np.int64)) for name, condition in (conditions or {}).items()},
+        'min' : sparse_table(np.where(valid, x, np.inf), np.minimum),
+        'max' : sparse_table(np.where(valid, x, -np.inf), np.maximum),
+        }
+
+
+def query_aggregate_index(index, start, end, reduction, condition=None):
+    """
+    Returns a reduction of the values in a time window from an aggregate index, see build_aggregate_index.
+    
+    Parameters:
+    - index: The aggregate index.
+    - start, end: The time window (both included).
+    - reduction: 'sum', 'mean', 'min', 'max', 'count' (values fulfilling the condition) or 'rows'.
+    - condition: Name of the condition, for 'count'.
+    
+    Returns:
+    - The reduction, NaN for the mean, minimum and maximum of no values.
+    """
+    i = np.searchsorted(index['dates'], np.datetime64(pd.Timestamp(start)), side='left')
+    j = np.searchsorted(index['dates'], np.datetime64(pd.Timestamp(end)), side='right')
+    j = max(i, j)
+    
+    if reduction == 'rows':
+        return int(j - i)
+    if reduction == 'count':
+        return int(index['conditions'][condition][j] - index['conditions'][condition][i])
+    if reduction == 'sum':
+        return float(index['sum'][j] - index['sum'][i])
+    
+    n = index['count'][j] - index['count'][i]
+    if n == 0:
+        return float('NaN')
+    if reduction == 'mean':
+        return float((index['sum'][j] - index['sum'][i]) / n)
+    if reduction in ['min', 'max']:
+        # Two overlapping windows of 2^k values cover the window
+        k = int(j - i).bit_length() - 1
+        table = index[reduction][k]
+        function = min if reduction == 'min' else max
+        return float(function(table[i], table[j - (1 << k)]))
+    
+    raise ValueError(f"Invalid reduction: {reduction}")
+
+
+def run_lengths(condition, groups=None):
+    """
+    Run-length encoding of the runs where a condition holds, e.g. consecutive warm days.
+
+    Parameters:
+    - condition: Boolean array or Series (NaN comparisons are False and break a run).
+    - groups: Optional array of group labels, sorted so that each group is contiguous
+              (e.g. years). Runs do not continue across groups.
+
+    Returns:
+    - Dictionary with the positions 'start' and lengths 'length' of the runs,
+      and the 'group' label of each run (None without groups).
+    """
+    condition = np.asarray(condition, dtype=bool)
+    n = condition.size
+
+    # A new run starts where the condition or the group changes
+    change = np.ones(n, dtype=bool)
+    change[1:] = condition[1:] != condition[:-1]
+    if groups is not None:
+        groups = np.asarray(groups)
+        change[1:] |= groups[1:] != groups[:-1]
+
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, n))
 
-    return df.query(qrstr)
+    # Keep the runs where the condition holds
+    holds = condition[starts]
+    starts, lengths = starts[holds], lengths[holds]
+
+    return {
+        'start' : starts,
+        'length' : lengths,
+        'group' : groups[starts] if groups is not None else None
+        }
+
+
+def longest_run(condition, groups=None):
+    """
+    Returns the length of the longest run where a condition holds, see run_lengths.
+
+    Parameters:
+    - condition: Boolean array or Series.
+    - groups: Optional array of group labels (contiguous).
+
+    Returns:
+    - The longest run (0 if the condition never holds), or without groups
+      a Series with the longest run of each group.
+    """
+    runs = run_lengths(condition, groups)
+    if groups is None:
+        return int(runs['length'].max()) if runs['length'].size > 0 else 0
+
+    # Longest run per group, 0 for groups without runs
+    labels, codes = np.unique(np.asarray(groups), return_inverse=True)
+    longest = np.zeros(labels.size, dtype=int)
+    np.maximum.at(longest, codes[runs['start']], runs['length'])
+    return pd.Series(longest, index=labels)
+
+
+
+def align_values(values, resolution=None, how='mean', join='outer'):
+    """
+    Aligns several series on a shared date index in one DataFrame, optionally resampled.
+    
+    Parameters:
+    - values: Dictionary of Series (with unique sorted DatetimeIndex) by column name.
+    - resolution: Optional resolution of the index (e.g. 'D', '12h', 'h'). All columns are
+                  resampled together, bins without values are NaN.
+    - how: Aggregation of the resampled values ('mean', 'max', 'min', 'sum', 'first', 'last'),
+           or a dictionary of aggregations by column name (default 'mean').
+    - join: 'outer' for the union of the dates, 'inner' for the dates of all series,
+            or 'left' for the dates of the first series.
+    
+    Returns:
+    - DataFrame with one column per series.
+    """
+    names = list(values)
+    frame = pd.concat([values[name].rename(name) for name in names], axis=1, join='outer' if join == 'left' else join)
+    if join == 'left':
+        frame = frame.reindex(values[names[0]].index)
+    
+    if resolution is None:
+        return frame
+    
+    if not isinstance(how, dict):
+        how = {name : how for name in names}
+    resampler = frame.resample(resolution)
+    resampled = resampler.agg({name : how.get(name, 'mean') for name in names})
+    return resampled.where(resampler.count() > 0)
+
+
+def get_time_slice(dates, start, end):
+    """
+    Returns the positions of a time range in sorted dates by binary search.
+    
+    Parameters:
+    - dates: Sorted dates (Series, DatetimeIndex or datetime64 array).
+    - start, end: The time range (both included).
+    
+    Returns:
+    - Tuple (i, j), the dates in the range are dates[i:j].
+    """
+    dates = np.asarray(dates)
+    i = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side='left')
+    j = np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side='right')
+    return i, max(i, j)
+
+
+def slice_time(values, ts):
+    """
+    Selects the values in a time range from a Series or DataFrame with a sorted DatetimeIndex,
+    by binary search on the index (the index is not copied or rebuilt).
+    
+    Parameters:
+    - values: Series or DataFrame with a sorted DatetimeIndex.
+    - ts: A timestamp or a tuple (start, end) of timestamps (both included).
+    
+    Returns:
+    - The values in the range.
+    """
+    if not isinstance(ts, (list, tuple)):
+        ts = (ts,)
+    i, j = get_time_slice(values.index, ts[0], ts[-1])
+    return values.iloc[i:j]
+
+
+def query_time_range(df, ts, idx):
+    """
+    Selects the rows with time intervals ('From Date' and 'To Date' columns) covering a time range,
+    e.g. the daily value of an hour, when no index dates are in the range.
+    
+    Parameters:
+    - df: The DataFrame.
+    - ts: A tuple (start, end) or (ts,) of timestamps.
+    - idx: The index column, used when the data has no time intervals.
+    
+    Returns:
+    - The rows with intervals covering the range (or with index dates in the range).
+    """
+    start, end = pd.Timestamp(ts[0]), pd.Timestamp(ts[-1])
+    
+    i1 = df.columns.str.startswith('From Date')
+    i2 = df.columns.str.startswith('To Date')
+    if not (i1.any() and i2.any()):
+        i, j = get_time_slice(df[idx], start, end)
+        return df.iloc[i:j]
+    
+    # Vectorized interval comparison
+    date_from = df[df.columns[i1.argmax()]].to_numpy()
+    date_to = df[df.columns[i2.argmax()]].to_numpy()
+    return df.loc[(date_from <= np.datetime64(start)) & (date_to >= np.datetime64(end))]
 
 
 def filter_time(df, ts, time_period, idx, col=None):
     """
     Filters data in a DataFrame based on a timestamp (ts) and optionally a time period.
     
+    The rows are located by binary search on the index column, which must be sorted in 
+    ascending order (as in smhi.get_data), a ValueError is raised otherwise. If no rows are 
+    found, rows with time intervals covering the range are selected (see query_time_range).
+    
     Parameters:
     - df: The DataFrame to filter.
-    - ts: The timestamp or range of timestamps to filter.
+    - ts: The timestamp or range of timestamps to filter (see format_ts).
     - time_period: Optional time period ('day', 'month', etc.).
     - idx: The column to use for filtering (e.g., 'Date').
     - col: Optional. The column to return after filtering.
     
     Returns:
-    - The filtered column (as a Series) or DataFrame.
+    - The filtered column (as a Series) or DataFrame, indexed by the index column.
     """
-    # Convert ts into the appropriate time filter (ISO format or range)
-    time_filter = get_filter(ts, time_period)
-
-    # Try filtering the DataFrame using the time filter
-    try:
-        if len(time_filter) == 1:
-            # For a single timestamp
-            filtered_data = df.set_index(idx).loc[time_filter[0]]
-        else:
-            # For a timestamp range
-            filtered_data = df.set_index(idx).loc[time_filter[0]:time_filter[1]]
-    except KeyError:
-        # If direct timestamp lookup fails, query the range using broader date columns if available
-        filtered_data = query_time_range(df, time_filter, idx)
+    # Time range of the filter
+    shorthand_map = {'d': 'day', 'm': 'month', 'y': 'year'}
+    time_period = shorthand_map.get(time_period, time_period)
+    if time_period in ['day', 'month', 'year']:
+        start, end = get_time_range(pd.Timestamp(ts[0]), time_period)
+    else:
+        start, end = ts[0], ts[-1]
+    
+    # Binary search needs sorted dates, unsorted dates would give a wrong selection
+    if not df[idx].is_monotonic_increasing:
+        raise ValueError(f"The column '{idx}' must be sorted in ascending order.")
+    
+    i, j = get_time_slice(df[idx], start, end)
+    if i < j:
+        filtered_data = df.iloc[i:j]
+    else:
+        # No dates in the range, query the range using broader date columns if available
+        filtered_data = query_time_range(df, (start, end), idx)
+    filtered_data = filtered_data.set_index(idx)
     
-    # Ensure that the filtered result is always a DataFrame, even if it's a single row
-    if isinstance(filtered_data, pd.Series):
-        filtered_data = filtered_data.to_frame().T
-
     # If a specific column is requested and exists in the data, return it as a Series
     if col is not None:
         if col in filtered_data.columns:
@@ -466,55 +1092,25 @@ def filter_time(df, ts, time_period, idx, col=None):
     return filtered_data
         
     
+def load_resource(filename):
+    """
+    Load a JSON resource of the package (loaded from disk only once).
+    
+    :param filename: The file name in the package directory (e.g., 'parameters.json').
+    :return: The content of the file.
+    """
+    if filename not in _resources:
+        with open(os.path.join(RESOURCE_DIR, filename), encoding='utf-8') as fp:
+            _resources[filename] = json.load(fp)
+    return _resources[filename]
+
+
 def get_parameters(return_format=None):
     # See https://opendata.smhi.se/apidocs/metobs/parameter.html
     # Thanks also to https://github.com/LasseRegin/smhi-open-data
     
-    # with open('parameters.json', encoding='utf-8') as fp:
-    #     parameters = json.load(fp)
-    
-    parameters = [
-        {'label' : 'TemperaturePast1h', 'key' : 1          , 'name' : 'Lufttemperatur'                        , 'Note' : 'Momentanvärde, 1 gång/tim'},
-        {'label' : 'TemperaturePast24h', 'key' : 2         , 'name' : 'Lufttemperatur'                        , 'Note' : 'Medelvärde 1 dygn, 1 gång/dygn, kl 00'},
-        {'label' : 'WindDirection', 'key' : 3              , 'name' : 'Vindriktning'                          , 'Note' : 'Medelvärde 10 min, 1 gång/tim'},
-        {'label' : 'WindSpeed', 'key' : 4                  , 'name' : 'Vindhastighet'	                      , 'Note' : '  Medelvärde 10 min, 1 gång/tim'},
-        {'label' : 'PrecipPast24hAt06', 'key' : 5          , 'name' : 'Nederbördsmängd'                       , 'Note' : 'Summa 1 dygn, 1 gång/dygn, kl 06'},
-        {'label' : 'Humidity', 'key' : 6                   , 'name' : 'Relativ Luftfuktighet'	              , 'Note' : 'Momentanvärde, 1 gång/tim'},
-        {'label' : 'PrecipPast1h', 'key' : 7               , 'name' : 'Nederbördsmängd'                       , 'Note' : 'Summa 1 timme, 1 gång/tim'},
-        {'label' : 'SnowDepthPast24h', 'key' : 8           , 'name' : 'Snödjup'                               , 'Note' : 'Momentanvärde, 1 gång/dygn, kl 06'},
-        {'label' : 'Pressure', 'key' : 9                   , 'name' : 'Lufttryck reducerat havsytans nivå'    , 'Note' : 'Vid havsytans nivå, momentanvärde, 1 gång/tim'},
-        {'label' : 'SunLast1h', 'key' : 10                 , 'name' : 'Solskenstid'                           , 'Note' : 'Summa 1 timme, 1 gång/tim'},
-        {'label' : 'RadiaGlob', 'key' : 11                 , 'name' : 'Global Irradians (svenska stationer)'  , 'Note' : 'Medelvärde 1 timme, 1 gång/tim'},
-        {'label' : 'Visibility', 'key' : 12                , 'name' : 'Sikt'                                  , 'Note' : 'Momentanvärde, 1 gång/tim'},
-        {'label' : 'CurrentWeather', 'key' : 13            , 'name' : 'Rådande väder'                         , 'Note' : 'Momentanvärde, 1 gång/tim resp 8 gånger/dygn'},
-        {'label' : 'PrecipPast15m', 'key' : 14             , 'name' : 'Nederbördsmängd'                       , 'Note' : 'Summa 15 min, 4 gånger/tim'},
-        {'label' : 'PrecipMaxPast15m', 'key' : 15          , 'name' : 'Nederbördsintensitet'                  , 'Note' : 'Max under 15 min, 4 gånger/tim'},
-        {'label' : 'CloudCover', 'key' : 16                , 'name' : 'Total molnmängd'                       , 'Note' : 'Momentanvärde, 1 gång/tim'},
-        {'label' : 'PrecipPast12h', 'key' : 17             , 'name' : 'Nederbörd'                             , 'Note' : '2 gånger/dygn, kl 06 och 18'},
-        {'label' : 'PrecipTypePast24h', 'key' : 18         , 'name' : 'Typ av nederbörd'                      , 'Note' : '4 gång/dygn'},
-        {'label' : 'TemperatureMinPast24h', 'key' : 19     , 'name' : 'Lufttemperatur'                        , 'Note' : 'Min, 1 gång per dygn'},
-        {'label' : 'TemperatureMaxPast24h', 'key' : 20     , 'name' : 'Lufttemperatur'                        , 'Note' : 'Max, 1 gång per dygn'},
-        {'label' : 'WindGust', 'key' : 21             , 'name' : 'Byvind'                                , 'Note' : 'Max, 1 gång/tim'},
-        {'label' : 'TemperatureMeanPastMonth', 'key' : 22  , 'name' : 'Lufttemperatur'                        , 'Note' : 'Medel, 1 gång per månad'},
-        {'label' : 'PrecipPastMonth', 'key' : 23           , 'name' : 'Nederbördsmängd'                       , 'Note' : 'Summa, 1 gång per månad'},
-        {'label' : 'LongwaveIrradians', 'key' : 24         , 'name' : 'Långvågs-Irradians'                    , 'Note' : 'Långvågsstrålning, medel 1 timme, varje timme'},
-        {'label' : 'WindSpeedMaxMeanPast3h', 'key' : 25    , 'name' : 'Max av MedelVindhastighet'             , 'Note' : 'Maximum av medelvärde 10 min, under 3 timmar,...'},
-        {'label' : 'TemperatureMinPast12h', 'key' : 26     , 'name' : 'Lufttemperatur'                        , 'Note' : 'Min, 2 gånger per dygn, kl 06 och 18'},
-        {'label' : 'TemperatureMaxPast12h', 'key' : 27	   , 'name' : 'Lufttemperatur'                        , 'Note' : 'Max, 2 gånger per dygn, kl 06 och 18'},
-        {'label' : 'CloudLayerLowest', 'key' : 28          , 'name' : 'Molnbas'                               , 'Note' : 'Lägsta molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudAmountLowest', 'key' : 29         , 'name' : 'Molnmängd'                             , 'Note' : 'Lägsta molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudLayerOther', 'key' : 30           , 'name' : 'Molnbas'                               , 'Note' : 'Andra molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudAmountOther', 'key' : 31          , 'name' : 'Molnmängd'                             , 'Note' : 'Andra molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudLayer3rd', 'key' : 32             , 'name' : 'Molnbas'                               , 'Note' : 'Tredje molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudAmount3rd', 'key' : 33            , 'name' : 'Molnmängd'                             , 'Note' : 'Tredje molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudLayer4th', 'key' : 34             , 'name' : 'Molnbas'                               , 'Note' : 'Fjärde molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudAmount4th', 'key' : 35            , 'name' : 'Molnmängd'                             , 'Note' : 'Fjärde molnlager, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudStorageLowest', 'key' : 36        , 'name' : 'Molnbas'                               , 'Note' : 'Lägsta molnbas, momentanvärde, 1 gång/tim'},
-        {'label' : 'CloudStorageLowestMin', 'key' : 37     , 'name' : 'Molnbas'                               , 'Note' : 'Lägsta molnbas, min under 15 min, 1 gång/tim'},
-        {'label' : 'PrecipIntensityMaxMeanPast15m', 'key' : 38, 'name' : 'Nederbördsintensitet'               , 'Note' : 'Max av medel under 15 min, 4 gånger/tim'},
-        {'label' : 'TemperatureDew', 'key' : 39            , 'name' : 'Daggpunktstemperatur'                  , 'Note' : 'Momentanvärde, 1 gång/tim'},
-        {'label' : 'GroundCondition', 'key' : 40           , 'name' : 'Markens tillstånd'                     , 'Note' : 'Momentanvärde, 1 gång/dygn, kl 06'},
-        ]
+    # Copy, so that callers can modify the list
+    parameters = [dict(p) for p in load_resource('parameters.json')]
     
     if return_format == 'df':
         return pd.DataFrame(parameters)
@@ -522,9 +1118,30 @@ def get_parameters(return_format=None):
         return parameters
 
 def get_indicators(return_format=None):
-    with open('indicators.json', encoding='utf-8') as fp:
-        indicators = json.load(fp)
+    # Copy, so that callers can modify the list
+    indicators = [dict(i) for i in load_resource('indicators.json')]
     if return_format == 'df':
         return pd.DataFrame(indicators)
     else:
-        return indicators
\ No newline at end of file
+        return indicators
+
+
+def get_parameter_registry():
+    """
+    Returns lookup tables for the weather parameters (built once on first use).
+    
+    :return: Dictionary with the lookup tables
+             'label' (key -> label), 'key' (label -> key),
+             'key_lower' (lower case label -> key) and
+             'matches' (resolved fuzzy inputs -> key, filled on use).
+    """
+    global _parameter_registry
+    if _parameter_registry is None:
+        parameters = get_parameters()
+        _parameter_registry = {
+            'label' : {p['key'] : p['label'] for p in parameters},
+            'key' : {p['label'] : p['key'] for p in parameters},
+            'key_lower' : {p['label'].lower() : p['key'] for p in parameters},
+            'matches' : {}
+            }
+    return _parameter_registry
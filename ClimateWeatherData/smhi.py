@@ -1,12 +1,31 @@
 #See also https://github.com/thebackman/SMHI
 
-from ClimateWeatherData import api_endpoints, helpers
-import requests
-import pandas as pd
+from ClimateWeatherData import api_endpoints, helpers, cache
 #import json
 #import logging
 import numbers
 #import csv
+import time
+
+# Heavy dependencies are loaded on first use
+pd = helpers.lazy_import('pandas')
+np = helpers.lazy_import('numpy')
+
+
+# Time to live in seconds of the cached station catalog of each parameter
+STATION_CATALOG_TTL = 3600
+
+# Cached station catalogs by parameter ID, see get_station_catalog
+_station_catalogs = {}
+
+# Cached availability matrices by parameter IDs, see get_availability
+_availability = {}
+
+# Cached spatial indexes by parameter ID, see get_spatial_index
+_spatial_index = {}
+
+# Mean radius of the earth in km
+EARTH_RADIUS = 6371.0
 
 
 def list_stations(params, ts=None, full_period=False):
@@ -24,50 +43,220 @@ def list_stations(params, ts=None, full_period=False):
     if not isinstance(params, (list, tuple)):
         params = [params]
     
-    # Validate and get parameter IDs
-    param_ids = [get_param_value(param) for param in params]
+    # Stations with data for all parameters (in the time range if given)
+    available = stations_available(params, [ts], full_period=full_period)
+    stations = available.index[available.iloc[:, 0].to_numpy()]
     
-    # Initialize with stations for the first parameter
-    df_stations = list_stations_for_param(param_ids[0], ts=ts, full_period=full_period)
+    # Return the full station data of the first parameter
+    df_stations = list_stations_for_param(get_param_value(params[0]))
+    df_stations = df_stations[df_stations['id'].isin(stations)]
     
-    # If no stations are found for the first parameter, return an empty result
     if df_stations.empty:
-        print(f"No stations found for parameter {params[0]}.")
-        return df_stations
+        print("No common stations found with data for all parameters.")
+    
+    return df_stations
+
+
+def get_availability(params):
+    """
+    Returns the station x parameter availability matrix, built once from the cached 
+    station catalogs (and again when a catalog is refreshed).
+    
+    :param params: A list of parameters (IDs or names).
+    :return: Dictionary with 'params' (list of p parameter IDs), 'id' (sorted array of n station IDs),
+             and 'from' and 'to' (n x p datetime64 arrays, NaT where a station has no data for a parameter).
+    """
+    param_ids = tuple(get_param_value(param) for param in params)
+    catalogs = [get_station_catalog(param_id) for param_id in param_ids]
+    catalog_times = tuple(catalog['time'] for catalog in catalogs)
+    
+    availability = _availability.get(param_ids)
+    if availability is not None and availability['catalog_times'] == catalog_times:
+        return availability
+    
+    # All stations listed for any of the parameters
+    station_ids = np.unique(np.concatenate([catalog['stations']['id'].to_numpy() for catalog in catalogs]))
+    
+    date_from = np.full((len(station_ids), len(param_ids)), np.datetime64('NaT', 'ns'))
+    date_to = date_from.copy()
+    for k, catalog in enumerate(catalogs):
+        df = catalog['stations']
+        rows = np.searchsorted(station_ids, df['id'].to_numpy())
+        date_from[rows, k] = df['from'].to_numpy().astype('datetime64[ns]')
+        date_to[rows, k] = df['to'].to_numpy().astype('datetime64[ns]')
+    
+    availability = {
+        'params' : list(param_ids),
+        'id' : station_ids,
+        'from' : date_from,
+        'to' : date_to,
+        'catalog_times' : catalog_times
+        }
+    _availability[param_ids] = availability
+    
+    return availability
+
+
+def stations_available(params, windows, full_period=False):
+    """
+    Check which stations have data for all parameters in many time windows at once.
+    
+    :param params: A single parameter or a list of parameters (IDs or names).
+    :param windows: List of time windows, each a timestamp, a (start, end) tuple, or None (any time).
+    :param full_period: If True, a station must have data for the entire window, 
+                        otherwise at some point during the window.
+    :return: Boolean DataFrame with one row per station ID and one column per window.
+    """
+    if not isinstance(params, (list, tuple)):
+        params = [params]
+    
+    availability = get_availability(params)
+    date_from = availability['from']
+    date_to = availability['to']
+    
+    # Window limits as arrays (None means any time)
+    starts = np.empty(len(windows), dtype='datetime64[ns]')
+    ends = np.empty(len(windows), dtype='datetime64[ns]')
+    for k, ts in enumerate(windows):
+        if ts is None:
+            starts[k] = np.datetime64(pd.Timestamp.max, 'ns')
+            ends[k] = np.datetime64(pd.Timestamp.min, 'ns')
+        elif isinstance(ts, (tuple, list)) and len(ts) == 2:
+            starts[k] = pd.to_datetime(ts[0]).to_datetime64()
+            ends[k] = pd.to_datetime(ts[1]).to_datetime64()
+        elif isinstance(ts, (str, pd.Timestamp)):
+            starts[k] = ends[k] = pd.to_datetime(ts).to_datetime64()
+        else:
+            raise ValueError("Invalid timestamp format. Must be a string, list, or tuple of two timestamps.")
+    
+    # Compare windows (w x 1 x 1) with stations and parameters (1 x n x p), NaT never matches
+    starts = starts[:, np.newaxis, np.newaxis]
+    ends = ends[:, np.newaxis, np.newaxis]
+    if full_period:
+        # Ensure stations have data for the entire period
+        in_window = (date_from <= starts) & (date_to >= ends)
+    else:
+        # Stations that were available at some point during the period
+        in_window = (date_from <= ends) & (date_to >= starts)
+    
+    # Any time: only require that the station has data for the parameter
+    any_time = np.array([ts is None for ts in windows])[:, np.newaxis, np.newaxis]
+    in_window = np.where(any_time, ~np.isnat(date_from), in_window)
+    
+    available = in_window.all(axis=2)
+    
+    return pd.DataFrame(available.T, index=pd.Index(availability['id'], name='id'), columns=range(len(windows)))
+
+
+def get_spatial_index(param='TemperaturePast24h'):
+    """
+    Returns the spatial index of the stations of a parameter, built once from the cached
+    station catalog (and again when the catalog is refreshed).
+    
+    :param param: The weather parameter ID or name.
+    :return: Dictionary with 'id' and 'name' (arrays of n stations) and 'xyz' (n x 3 array of
+             unit vectors of the station positions).
+    """
+    param = get_param_value(param)
+    catalog = get_station_catalog(param)
     
-    # Create a set of station IDs for the first parameter
-    stations = set(df_stations['id'])
+    spatial_index = _spatial_index.get(param)
+    if spatial_index is not None and spatial_index['catalog_time'] == catalog['time']:
+        return spatial_index
     
-    # Loop through the rest of the parameters and find intersections of stations
-    for param_id in param_ids[1:]:
-        df = list_stations_for_param(param_id, ts=ts, full_period=full_period)
+    df = catalog['stations']
+    spatial_index = {
+        'id' : df['id'].to_numpy(),
+        'name' : df['name'].to_numpy(),
+        'xyz' : helpers.latlon_to_xyz(df['latitude'].to_numpy(), df['longitude'].to_numpy()),
+        'catalog_time' : catalog['time']
+        }
+    _spatial_index[param] = spatial_index
+    
+    return spatial_index
+
+
+def nearest_stations(latitude, longitude, k=1, radius=None, params='TemperaturePast24h', ts=None, full_period=False, chunk_size=4096):
+    """
+    Find the nearest stations to one or many sites.
+    
+    :param latitude: Latitude of the site(s) in decimal degrees, a number or an array.
+    :param longitude: Longitude of the site(s) in decimal degrees, a number or an array.
+    :param k: Number of nearest stations per site (None for all stations within the radius).
+    :param radius: Optional maximum distance in km.
+    :param params: A parameter or list of parameters the stations must have data for (see list_stations).
+    :param ts: Timestamp or range of timestamps (list or tuple) the stations must have data for.
+    :param full_period: If True, ensures that the station has data available for the entire specified period.
+    :param chunk_size: Number of sites processed at a time (limits memory use).
+    :return: DataFrame with one row per site and station: 'site' (position of the site in the input), 
+             'rank' (0 for the nearest), 'id', 'name' and 'distance' (km).
+    """
+    if k is None and radius is None:
+        raise ValueError("Either k or radius must be specified.")
+    
+    if not isinstance(params, (list, tuple)):
+        params = [params]
+    
+    # Stations with data for all parameters (in the time range if given)
+    spatial_index = get_spatial_index(params[0])
+    available = stations_available(params, [ts], full_period=full_period).iloc[:, 0]
+    valid = np.isin(spatial_index['id'], available.index[available.to_numpy()])
+    station_ids = spatial_index['id'][valid]
+    station_names = spatial_index['name'][valid]
+    station_xyz = spatial_index['xyz'][valid]
+    
+    site_xyz = helpers.latlon_to_xyz(np.atleast_1d(latitude), np.atleast_1d(longitude))
+    n_stations = len(station_ids)
+    n_nearest = n_stations if k is None else min(k, n_stations)
+    
+    results = []
+    for start in range(0, len(site_xyz), chunk_size):
+        # Great circle distance from the angle between the unit vectors
+        cos_angle = np.clip(site_xyz[start:start + chunk_size] @ station_xyz.T, -1.0, 1.0)
+        distance = EARTH_RADIUS * np.arccos(cos_angle)
         
-        # If no stations are found for the parameter, return an empty result
-        if df.empty:
-            print(f"No stations found for parameter ID {param_id}.")
-            return df
+        # k nearest stations, sorted by distance
+        if n_nearest < n_stations:
+            nearest = np.argpartition(distance, n_nearest - 1, axis=1)[:, :n_nearest]
+        else:
+            nearest = np.broadcast_to(np.arange(n_stations), (len(distance), n_stations))
+        nearest_distance = np.take_along_axis(distance, nearest, axis=1)
+        order = np.argsort(nearest_distance, axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_distance = np.take_along_axis(nearest_distance, order, axis=1)
         
-        # Update the station list by intersecting with the new parameter's stations
-        stations = stations.intersection(df['id'].to_list())
+        sites = np.repeat(np.arange(start, start + len(distance)), n_nearest)
+        ranks = np.tile(np.arange(n_nearest), len(distance))
+        keep = np.ones(sites.size, dtype=bool) if radius is None else nearest_distance.ravel() <= radius
         
-        # If no common stations are left, return an empty result
-        if not stations:
-            print("No common stations found with data for all parameters.")
-            return pd.DataFrame(columns=df_stations.columns)
+        results.append(pd.DataFrame({
+            'site' : sites[keep],
+            'rank' : ranks[keep],
+            'id' : station_ids[nearest.ravel()[keep]],
+            'name' : station_names[nearest.ravel()[keep]],
+            'distance' : nearest_distance.ravel()[keep]
+            }))
     
-    # Return the full station data, filtered by the station IDs that have data for all parameters
-    return df_stations[df_stations['id'].isin(stations)]
+    return pd.concat(results, ignore_index=True)
 
 
-def list_stations_for_param(param, ts=None, full_period=False):
+def get_station_catalog(param, refresh=False):
     """
-    Helper function to list stations for a single parameter.
+    Returns the station catalog for a parameter, downloaded once and kept in memory
+    for STATION_CATALOG_TTL seconds.
     
-    :param param: The weather parameter ID to list stations for.
-    :param ts: Timestamp or range of timestamps (list or tuple) to filter stations.
-    :param full_period: If True, ensures that the station has data available for the entire specified period.
-    :return: DataFrame of stations for the given parameter.
+    :param param: The weather parameter ID or name.
+    :param refresh: If True, download the catalog again.
+    :return: Dictionary with the station DataFrame ('stations') and the lookup tables
+             'name' (id -> name), 'id' (name -> id), 'id_lower' (lower case name -> id),
+             'updated' (id -> updated timestamp) and 'matches' (resolved fuzzy names -> id, filled on use).
     """
+    param = get_param_value(param)
+    
+    catalog = _station_catalogs.get(param)
+    if not refresh and catalog is not None and time.monotonic() - catalog['time'] < STATION_CATALOG_TTL:
+        return catalog
+    
     # Create the API address
     adr = api_endpoints.ADR_PARAMETER
     adr_full = adr.format(parameter=param)
@@ -80,31 +269,66 @@ def list_stations_for_param(param, ts=None, full_period=False):
 
     # Fix the date and time variables into something readable
     for col in ['from', 'to', 'updated']:
-        df[col] = pd.to_datetime(df[col], unit="ms")
+        df[col] = helpers.parse_epoch_ms(df[col])
+    
+    # Lookup tables (first station kept for duplicated names)
+    ids = df['id'].tolist()
+    names = df['name'].tolist()
+    name_to_id = {}
+    name_lower_to_id = {}
+    for station_id, name in zip(ids, names):
+        name_to_id.setdefault(name, station_id)
+        name_lower_to_id.setdefault(name.lower(), station_id)
+    
+    catalog = {
+        'time' : time.monotonic(),
+        'stations' : df,
+        'name' : dict(zip(ids, names)),
+        'id' : name_to_id,
+        'id_lower' : name_lower_to_id,
+        'updated' : dict(zip(ids, df['updated'])),
+        'matches' : {}
+        }
+    _station_catalogs[param] = catalog
+    
+    return catalog
+
+
+def list_stations_for_param(param, ts=None, full_period=False):
+    """
+    Helper function to list stations for a single parameter.
+    
+    :param param: The weather parameter ID to list stations for.
+    :param ts: Timestamp or range of timestamps (list or tuple) to filter stations.
+    :param full_period: If True, ensures that the station has data available for the entire specified period.
+    :return: DataFrame of stations for the given parameter.
+    """
+    # Cached station catalog (copy, so that callers can modify it)
+    df = get_station_catalog(param)['stations'].copy()
     
     # If no timestamp is provided, return the full list
     if ts is None:
         return df
     
+    date_from = df['from'].to_numpy()
+    date_to = df['to'].to_numpy()
+    
     # If a single timestamp is provided
     if isinstance(ts, str):
-        ts = pd.to_datetime(ts).isoformat()
-        qrstr = "`from` <= '{0}' and `to` >= '{0}'".format(ts)
-        return df.query(qrstr)
+        ts = np.datetime64(pd.to_datetime(ts))
+        return df.loc[(date_from <= ts) & (date_to >= ts)]
     
     # If a list or tuple of two timestamps is provided, filter based on the range
     elif isinstance(ts, (tuple, list)) and len(ts) == 2:
-        start_ts = pd.to_datetime(ts[0]).isoformat()
-        end_ts = pd.to_datetime(ts[1]).isoformat()
+        start_ts = np.datetime64(pd.to_datetime(ts[0]))
+        end_ts = np.datetime64(pd.to_datetime(ts[1]))
 
         if full_period:
             # Ensure stations have data for the entire period
-            qrstr = "`from` <= '{0}' and `to` >= '{1}'".format(start_ts, end_ts)
+            return df.loc[(date_from <= start_ts) & (date_to >= end_ts)]
         else:
             # Filter stations that were available at some point during the period
-            qrstr = "`from` <= '{1}' and `to` >= '{0}'".format(start_ts, end_ts)
-        
-        return df.query(qrstr)
+            return df.loc[(date_from <= end_ts) & (date_to >= start_ts)]
     
     else:
         raise ValueError("Invalid timestamp format. Must be a string, list, or tuple of two timestamps.")
@@ -130,28 +354,40 @@ def get_station_info(station_input, param_id=None, ts=None):
     - station_id (int) if station name is provided.
     """
     # If no param_id is provided, use 'TemperaturePast24h' as the default
-    if param_id is None:
-        param = 'TemperaturePast24h'        
+    param = 'TemperaturePast24h' if param_id is None else param_id
+    
+    # Cached station catalog and lookup tables
+    catalog = get_station_catalog(param)
     
-    # Get all stations for the given parameter and optional timestamp
-    stations = list_stations(param, ts)
+    # Restrict to stations with data at the given time
+    valid_ids = None
+    if ts is not None:
+        valid_ids = set(list_stations(param, ts)['id'])
 
     # If the input is a station ID (int), return the corresponding station name
     if isinstance(station_input, numbers.Number):
-        try:
-            station_name = stations.set_index('id').loc[station_input, 'name']
-            return station_name
-        except KeyError:
+        if station_input not in catalog['name'] or (valid_ids is not None and station_input not in valid_ids):
             raise ValueError(f"Station ID {station_input} not found.")
+        return catalog['name'][station_input]
     
     # If the input is a station name (str), return the corresponding station ID
     elif isinstance(station_input, str):
-        try:
-            valid_station = helpers.validatestring(station_input, stations['name'].to_list())
-            station_id = stations.set_index('name').loc[valid_station, 'id']
-            return station_id
-        except KeyError:
-            raise ValueError(f"Station name '{station_input}' not found.")
+        if valid_ids is None:
+            station_id = catalog['id'].get(station_input)
+            if station_id is None:
+                station_id = catalog['id_lower'].get(station_input.lower())
+            if station_id is None:
+                # Partial match, validated once and remembered
+                if station_input not in catalog['matches']:
+                    valid_station = helpers.validatestring(station_input, catalog['id'].keys())
+                    catalog['matches'][station_input] = catalog['id'][valid_station]
+                station_id = catalog['matches'][station_input]
+        else:
+            # Match only among the stations with data at the given time
+            valid_names = [name for name, station_id in catalog['id'].items() if station_id in valid_ids]
+            valid_station = helpers.validatestring(station_input, valid_names)
+            station_id = catalog['id'][valid_station]
+        return station_id
     
     else:
         raise ValueError("station_input must be either a station name (str) or station ID (int).")
@@ -163,19 +399,35 @@ def get_station_value(station):
     else:
         station_id = get_station_info(station)
     return station_id    
+
+
+def get_station_values(stations, param_id=None):
+    """
+    Resolve many stations at once.
+    
+    :param stations: List of station names and/or IDs.
+    :param param_id: Optional parameter ID to look up the stations for, defaults to 'TemperaturePast24h'.
+    :return: List of station IDs in the same order.
+    """
+    resolved = {}
+    station_ids = []
+    for station in stations:
+        if station not in resolved:
+            if isinstance(station, numbers.Number):
+                resolved[station] = station
+            else:
+                resolved[station] = get_station_info(station, param_id=param_id)
+        station_ids.append(resolved[station])
+    return station_ids
     
 
 def get_param_name(parameter):    
-    # Load parameters
-    df_parameters = pd.DataFrame(helpers.get_parameters())
-    
     # Get parameter ID (normalizes whether input is name or ID)
     parameter_id = get_param_value(parameter)
     
     try:
         # Retrieve the corresponding parameter name
-        parameter_name = df_parameters.set_index('key').loc[parameter_id, 'label']
-        return parameter_name
+        return helpers.get_parameter_registry()['label'][parameter_id]
     except KeyError:
         raise ValueError(f"Parameter {parameter} not found.")
 
@@ -184,16 +436,22 @@ def get_param_name(parameter):
 def get_param_value(parameter):
     # check if parameter isnumeric
     if isinstance(parameter,numbers.Number):
-        parameter_id = parameter
-    else:
-        # Load parameters
-        df_parameters = pd.DataFrame(helpers.get_parameters())
-        # Validate string input
-        valid_param = helpers.validatestring(parameter, df_parameters['label'].to_list())
-        # Get id
-        parameter_id = df_parameters.set_index('label').loc[valid_param, 'key']
+        return parameter
     
-    return parameter_id        
+    registry = helpers.get_parameter_registry()
+    
+    # Exact or case-insensitive label
+    if parameter in registry['key']:
+        return registry['key'][parameter]
+    parameter_id = registry['key_lower'].get(parameter.lower())
+    if parameter_id is not None:
+        return parameter_id
+    
+    # Partial match, validated once and remembered
+    if parameter not in registry['matches']:
+        valid_param = helpers.validatestring(parameter, registry['key'].keys())
+        registry['matches'][parameter] = registry['key'][valid_param]
+    return registry['matches'][parameter]
 
 def isin_station(param, station, ts=None):   
     # check if parameter is available on station
@@ -213,13 +471,31 @@ def get_time_period(ts, time_period, time_format='%Y-%m-%d %H:%M'):
 
 
 
-def get_corrected(param, station, translate=True):
+def get_station_updated(param, station):
+    """
+    Returns the timestamp when the data for a station and parameter was last updated by SMHI.
+    
+    :param param: The weather parameter ID or name.
+    :param station: The station ID or name.
+    :return: The 'updated' timestamp from the parameter endpoint, or None if the station is not listed.
+    """
+    param = get_param_value(param)
+    station = get_station_value(station)
+    
+    return get_station_catalog(param)['updated'].get(station)
+
+
+def get_corrected(param, station, translate=True, use_cache=None):
     """
     Get corrected data from the SMHI API for a specific weather parameter and station.
     
+    The downloaded data is kept in the on-disk cache (see cache.py) and reused as long as
+    the station's 'updated' timestamp from the parameter endpoint is unchanged.
+    
     :param param: The weather parameter ID or name.
     :param station: The station ID.
     :param translate: Whether to translate the column names to English.
+    :param use_cache: Whether to use the on-disk cache (defaults to cache.USE_CACHE).
     :return: A DataFrame with the corrected data.
     """
     # Validate the input weather parameter (param)
@@ -228,6 +504,9 @@ def get_corrected(param, station, translate=True):
     # Validate the input station
     station = get_station_value(station)
     
+    if use_cache is None:
+        use_cache = cache.USE_CACHE
+    
     # Create the API address
     adr_full = api_endpoints.ADR_CORRECTED.format(parameter=param, station=station)
     
@@ -263,13 +542,26 @@ def get_corrected(param, station, translate=True):
     # Get the configuration for the given parameter, or apply a default configuration
     config = param_configs.get(param, default_config)
     
-    # Download the CSV data
-    df = helpers.read_csv(
-        adr_full,
-        usecols=config['usecols'],
-        parse_dates=config['parse_dates'],
-        dtype={config['k_value']: 'numeric'}
-    )
+    # Use cached data if it is still up to date
+    df = None
+    updated = None
+    if use_cache:
+        updated = get_station_updated(param, station)
+        if updated is not None:
+            df = cache.load(param, station, 'corrected-archive', updated=updated)
+    
+    if df is None:
+        # Download the CSV data (precipitation types are names)
+        df = helpers.read_csv(
+            adr_full,
+            usecols=config['usecols'],
+            parse_dates=config['parse_dates'],
+            dtype={config['k_value']: 'numeric'} if param != 18 else None
+        )
+        if param == 18:
+            df = encode_precip_types(df, df.columns[config['k_value']], df.columns[config['k_value'] - 1])
+        if updated is not None:
+            cache.store(df, param, station, 'corrected-archive', updated=updated)
     
     # Rename columns to English if required
     df = helpers.rename_columns_to_english(df, config['k_value'], translate=translate)
@@ -279,6 +571,20 @@ def get_corrected(param, station, translate=True):
 
 
 def get_latest_months(param, station):
+    # Latest 4 months of data
+    return get_latest(param, station, period='latest-months')
+
+
+def get_latest(param, station, period='latest-months'):
+    """
+    Get the latest (not yet quality corrected) data from the SMHI API.
+    
+    :param param: The weather parameter ID or name.
+    :param station: The station ID or name.
+    :param period: The period to fetch ('latest-hour', 'latest-day' or 'latest-months').
+    :return: A DataFrame with the latest data (empty if there are no values in the period, or 
+             if the period is not available for the parameter and station).
+    """
     # validate input weather parameter (param)
     param = get_param_value(param)   
     
@@ -286,19 +592,27 @@ def get_latest_months(param, station):
     station = get_station_value(station)
     
     # create the API adress
-    adr = api_endpoints.ADR_LATEST_MONTHS
-    adr_full = adr.format(parameter = param, station = station)    
-    # print(adr_full)
+    adr_full = api_endpoints.get_period_data_url(param, station, period)
     
     # initiate the call
-    response = requests.get(adr_full)    
-    # try to get the json data (exceptions will be catched later)    
-    df = pd.DataFrame(response.json()['value'])
+    response = helpers.http_get(adr_full)
+    
+    # Period not served for the parameter or station (e.g., latest-hour for daily values)
+    if response.status_code == 404:
+        return pd.DataFrame()
+    response.raise_for_status()
+    
+    values = response.json().get('value')
+    if not values:
+        return pd.DataFrame()
+    df = pd.DataFrame(values)
     
     df.rename(columns = {'Value':'value'}, inplace=True)
 
     date_cols = ['from', 'to', 'ref']
-    if param in [2,5] or all([key in df for key in date_cols]):    
+    if param in [18]: #PrecipTypePast24h
+        pass
+    elif param in [2,5] or all([key in df for key in date_cols]):    
         df['value'] = pd.to_numeric(df['value'])
     elif param in [17]: #PrecipPast12h
         date_cols = ['date']
@@ -308,9 +622,9 @@ def get_latest_months(param, station):
     
     for col in date_cols:
         if col=='ref':
-            df[col] = pd.to_datetime(df[col]).dt.date
+            df[col] = helpers.parse_datetime(df[col]).dt.date
         else:
-            df[col] = pd.to_datetime(df[col]*1e6)
+            df[col] = helpers.parse_epoch_ms(df[col])
     
     
     columns = {
@@ -324,9 +638,384 @@ def get_latest_months(param, station):
     # columns[df.columns[k_value]] = 'Value'    
     df.rename(columns = columns, inplace=True)
     
+    if param == 18:
+        df = encode_precip_types(df, 'Value', 'Date')
+    
     return df
 
 
+def encode_precip_types(df, value_col, day_col):
+    """
+    Encodes precipitation type data (PrecipTypePast24h) as one row per day.
+    
+    SMHI reports one row per precipitation type, so a day can have several rows. The types
+    of a day are combined into a bitmask (see helpers.encode_types and helpers.get_type_mask),
+    which is decoded once here instead of matching type names in every indicator.
+    
+    :param df: DataFrame with precipitation type names.
+    :param value_col: The column with the precipitation types.
+    :param day_col: The column with the day.
+    :return: DataFrame with one row per day (the first row of the day) and the bitmask as value.
+    """
+    if df.empty:
+        return df
+    
+    days = df.groupby(day_col, sort=True, as_index=False).first()
+    days[value_col] = helpers.encode_types(df[value_col].to_numpy(), df[day_col].to_numpy())
+    return days[df.columns]
+
+
+async def get_many_async(pairs, period='corrected-archive', max_concurrency=8, compact=True, **kwargs):
+    """
+    Download data for many (parameter, station) pairs concurrently.
+    
+    Each pair is fetched with the same function as the synchronous API (get_corrected or
+    get_latest_months), running on a thread pool. The threads share an HTTP session of their
+    own with a connection pool for max_concurrency downloads (see helpers.use_session), the
+    shared session and its settings are not changed.
+    
+    The data is compacted by default (see compact_data) to hold many series in memory. With
+    compact=False, the frames are identical to those of the synchronous functions.
+    
+    :param pairs: List of (parameter, station) tuples, parameter and station as ID or name.
+    :param period: 'corrected-archive' (get_corrected) or 'latest-months' (get_latest_months).
+    :param max_concurrency: Maximum number of downloads in flight at the same time.
+    :param compact: If True, the data is compacted (not with translate=False). If False, the
+                    data is the same as from get_corrected or get_latest_months.
+    :param kwargs: Extra arguments passed to the fetch function (e.g., translate=False).
+    :return: Dictionary with the DataFrame for each (parameter, station) pair.
+    """
+    # Imported here, asyncio and concurrent.futures would double the import time of the package
+    import asyncio
+    from concurrent import futures
+    
+    fetch_functions = {
+        'corrected-archive' : get_corrected,
+        'latest-months' : get_latest_months
+        }
+    if period not in fetch_functions:
+        raise ValueError(f"Invalid period: {period}. Must be one of {list(fetch_functions)}.")
+    fetch = fetch_functions[period]
+    
+    # Unique pairs, keeping the input order
+    pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    # Load the lazily imported modules before the threads use them
+    helpers.load_lazy(pd)
+    helpers.load_lazy(np)
+    
+    # Session of the call, with a connection pool for the concurrent downloads
+    session = helpers.create_session(pool_size=max(max_concurrency, helpers.session_config['pool_size']))
+    
+    def fetch_data(param, station):
+        with helpers.use_session(session):
+            data = fetch(param, station, **kwargs)
+        if compact and kwargs.get('translate', True):
+            data = compact_data(data)
+        return data
+    
+    with session, futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        async def fetch_pair(param, station):
+            async with semaphore:
+                return await loop.run_in_executor(executor, lambda: fetch_data(param, station))
+        
+        results = await asyncio.gather(*(fetch_pair(param, station) for param, station in pairs))
+    
+    return dict(zip(pairs, results))
+
+
+def get_many(pairs, period='corrected-archive', max_concurrency=8, compact=True, **kwargs):
+    """
+    Synchronous wrapper of get_many_async, see get_many_async for the arguments.
+    
+    It runs its own event loop, so it raises a RuntimeError when called from a running
+    event loop (e.g., in a Jupyter notebook), await get_many_async there instead. As in
+    get_many_async, the data is compacted by default, compact=False gives the same frames
+    as get_corrected or get_latest_months.
+    
+    :return: Dictionary with the DataFrame for each (parameter, station) pair.
+    """
+    import asyncio
+    
+    # asyncio.run needs a thread without a running event loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(get_many_async(pairs, period=period, max_concurrency=max_concurrency, compact=compact, **kwargs))
+    raise RuntimeError("get_many can not be called from a running event loop, use await get_many_async instead.")
+
+
+def get_index_column(data):
+    """
+    Detect the time column to use as index ('Date (UTC)' for hourly data, 'Date' for daily data).
+    
+    :param data: DataFrame with weather data.
+    :return: The name of the index column.
+    """
+    if 'Date (UTC)' in data.columns:
+        return 'Date (UTC)'  # Use 'Date (UTC)' if available (for hourly data)
+    elif 'Date' in data.columns:
+        return 'Date'  # Use 'Date' for daily data
+    else:
+        raise ValueError("Neither 'Date' nor 'Date (UTC)' columns found in the data.")
+
+
+def parse_date_column(data):
+    # Representative day as datetime, for both historical and latest data
+    if 'Date' in data.columns:
+        data['Date'] = helpers.parse_datetime(data['Date'], errors='coerce')
+    return data
+
+
+# Periods with the latest (not yet corrected) data, from the smallest to the largest
+LATEST_PERIODS = ['latest-hour', 'latest-day', 'latest-months']
+
+# Approximate time span back from now covered by each latest period (pd.DateOffset arguments)
+LATEST_PERIOD_SPANS = {
+    'latest-hour' : {'hours' : 1},
+    'latest-day' : {'days' : 1},
+    'latest-months' : {'months' : 4}
+    }
+
+# The corrected archive does not include the latest 3 months (pd.DateOffset arguments)
+ARCHIVE_DELAY = {'months' : 3}
+
+# A series refreshed incrementally is downloaded again when its corrected archive is this far behind (see refresh_values)
+ARCHIVE_REFRESH = {'months' : 1}
+
+# Time resolution of the start of each latest period (a daily value for yesterday is in latest-day)
+LATEST_PERIOD_RESOLUTION = {
+    'latest-hour' : 'h',
+    'latest-day' : 'D',
+    'latest-months' : 'D'
+    }
+
+
+def plan_periods(ts=None):
+    """
+    Returns the smallest set of periods that covers the requested time range.
+    
+    :param ts: Optional tuple of datetime objects (see helpers.format_ts). If None, all data is requested.
+    :return: List of periods, e.g. ['corrected-archive', 'latest-months'] or ['latest-day'].
+    """
+    # All data
+    if ts is None:
+        return ['corrected-archive', 'latest-months']
+    
+    # The periods are relative to the current time in UTC, like the observation times
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    start, end = min(ts), max(ts)
+    
+    periods = []
+    
+    # Corrected historical data (last 3 months not available)
+    if start <= now - pd.DateOffset(**ARCHIVE_DELAY):
+        periods.append('corrected-archive')
+    
+    # Latest data, the smallest period that reaches back to the start of the range
+    if end > now - pd.DateOffset(**LATEST_PERIOD_SPANS['latest-months']):
+        latest_period = 'latest-months'
+        if not periods:
+            for period in LATEST_PERIODS:
+                period_start = (now - pd.DateOffset(**LATEST_PERIOD_SPANS[period])).floor(LATEST_PERIOD_RESOLUTION[period])
+                if start >= period_start:
+                    latest_period = period
+                    break
+        periods.append(latest_period)
+    
+    return periods
+
+
+def get_data(param, station, ts=None, idx=None, compact=False):
+    """
+    Get the combined historical and latest data for a station and parameter.
+    
+    Only the periods needed for the requested time range are downloaded (see plan_periods).
+    If a short latest period turns out not to cover the start of the range, the next larger
+    period is used instead.
+    
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param ts: Optional tuple of datetime objects (see helpers.format_ts), used to select 
+               the periods to download.
+    :param idx: The index column, detected automatically if not provided.
+    :param compact: If True, the data is compacted (see compact_data).
+    :return: DataFrame sorted by the index column, historical data kept for overlapping dates.
+    """
+    data, _ = get_data_archive_end(param, station, ts=ts, idx=idx)
+    
+    if compact:
+        data = compact_data(data, idx=idx)
+    
+    return data
+
+
+def get_data_archive_end(param, station, ts=None, idx=None):
+    """
+    Get the combined historical and latest data for a station and parameter (see get_data),
+    together with the last timestamp of the corrected archive in it.
+    
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param ts: Optional tuple of datetime objects (see helpers.format_ts), used to select 
+               the periods to download.
+    :param idx: The index column, detected automatically if not provided.
+    :return: Tuple (data, archive_end), archive_end is NaT if the corrected archive is not used or empty.
+    """
+    periods = plan_periods(ts)
+    
+    data_frames = []
+    
+    # Corrected historical data
+    if 'corrected-archive' in periods:
+        data_historical = parse_date_column(get_corrected(param, station))
+        data_frames.append(data_historical)
+
+    # Latest data
+    if periods[-1] in LATEST_PERIODS:
+        # The start of the range must be covered unless the historical data is also used
+        start = None if ts is None or 'corrected-archive' in periods else min(ts)
+        
+        for period in LATEST_PERIODS[LATEST_PERIODS.index(periods[-1]):]:
+            data_latest = parse_date_column(get_latest(param, station, period=period))
+            if start is None or period == LATEST_PERIODS[-1]:
+                break
+            if not data_latest.empty:
+                latest_idx = idx if idx is not None else get_index_column(data_latest)
+                if data_latest[latest_idx].min() <= start:
+                    break
+        data_frames.append(data_latest)
+
+    # Automatically detect the correct index column if idx is not provided
+    if idx is None:
+        idx = get_index_column(pd.DataFrame(columns=[col for df in data_frames for col in df.columns]))
+    
+    # Merge historical and latest data, keeping historical data for overlapping dates
+    data = sort_unique(data_frames[0], idx)
+    archive_end = pd.NaT
+    if 'corrected-archive' in periods and not data.empty:
+        archive_end = data[idx].iloc[-1]
+    if len(data_frames) > 1:
+        data = merge_sorted(data, sort_unique(data_frames[1], idx), idx)
+    data = data.reset_index(drop=True)
+    
+    return data, archive_end
+
+
+def sort_unique(data, idx):
+    """
+    Returns data sorted by the index column without duplicated dates (the first row kept).
+    
+    Data from the API is already in chronological order, which is checked in one pass
+    instead of sorting.
+    
+    :param data: DataFrame with weather data.
+    :param idx: The index column.
+    :return: The sorted DataFrame.
+    """
+    if data.empty:
+        return data
+    
+    dates = data[idx].to_numpy()
+    if not (dates[1:] >= dates[:-1]).all():
+        data = data.sort_values(by=idx, kind='stable')
+        dates = data[idx].to_numpy()
+    
+    # Duplicated dates are adjacent
+    duplicated = dates[1:] == dates[:-1]
+    if duplicated.any():
+        data = data.loc[np.concatenate(([True], ~duplicated))]
+    return data
+
+
+def merge_sorted(historical, latest, idx):
+    """
+    Merges historical and latest data that are both sorted by the index column (see sort_unique),
+    keeping historical data for overlapping dates.
+    
+    The data only overlap in the last months of the historical data, so the overlap is located
+    by binary search and only the rows in the overlap are compared and sorted. The rest of the
+    data is spliced as it is.
+    
+    :param historical: DataFrame with historical (corrected) data.
+    :param latest: DataFrame with the latest data.
+    :param idx: The index column.
+    :return: DataFrame with the merged data (the index is not reset).
+    """
+    if historical.empty or latest.empty:
+        return pd.concat([historical, latest])
+    
+    historical_dates = historical[idx].to_numpy()
+    latest_dates = latest[idx].to_numpy()
+    
+    # Overlap: historical data from the first latest date, latest data up to the last historical date
+    start = np.searchsorted(historical_dates, latest_dates[0], side='left')
+    end = np.searchsorted(latest_dates, historical_dates[-1], side='right')
+    
+    # Latest data in the overlap for dates missing in the historical data
+    overlap = historical.iloc[start:]
+    missing = ~np.isin(latest_dates[:end], historical_dates[start:])
+    if missing.any():
+        overlap = pd.concat([overlap, latest.iloc[:end].loc[missing]]).sort_values(by=idx, kind='stable')
+    
+    return pd.concat([historical.iloc[:start], overlap, latest.iloc[end:]])
+
+
+def compact_data(data, idx=None):
+    """
+    Returns a compact copy of weather data, for holding many series in memory (bulk loads).
+    
+    Of the date columns only the index column is kept (as datetime64), values are float32
+    (precipitation type masks stay integers) and quality flags are categorical.
+    
+    :param data: DataFrame with weather data (English column names).
+    :param idx: The index column, detected automatically if not provided.
+    :return: DataFrame with the index column, 'Value' and 'Quality'.
+    """
+    if data.empty:
+        return data
+    if idx is None:
+        idx = get_index_column(data)
+    
+    values = data['Value']
+    if pd.api.types.is_float_dtype(values):
+        values = values.astype('float32')
+    
+    compact = {idx : pd.to_datetime(data[idx]), 'Value' : values}
+    if 'Quality' in data.columns:
+        compact['Quality'] = data['Quality'].astype('category')
+    return pd.DataFrame(compact)
+
+
+def select_values(data, param, ts=None, time_period=None, idx=None, col='Value'):
+    """
+    Select the values of a column from combined data, see get_values.
+    
+    :param data: DataFrame from get_data.
+    :param param: The weather parameter (either ID or name), used to name the values.
+    :param ts: Optional tuple of datetime objects (see helpers.format_ts).
+    :param time_period: Time period ('y', 'm', 's') for yearly, monthly, or seasonal data.
+    :param idx: The index column, detected automatically if not provided.
+    :param col: The column name to extract (default is 'Value').
+    :return: Filtered weather data.
+    """
+    if idx is None:
+        idx = get_index_column(data)
+    
+    # Filter data based on ts and time_period if provided
+    if ts is not None:
+        values = helpers.filter_time(data, ts, time_period, idx=idx, col=col)
+    else:
+        # Values indexed by the (sorted) index column, without copying the other columns
+        values = pd.Series(data[col].to_numpy(), index=pd.DatetimeIndex(data[idx], name=idx))
+
+    values.name = get_param_name(param)
+    return values
+
+
 def get_values(param, station, ts=None, time_period=None, idx=None, col='Value', check_station=False):
     """
     Get weather parameter values for a given station, parameter, and timestamp or time period.
@@ -348,47 +1037,192 @@ def get_values(param, station, ts=None, time_period=None, idx=None, col='Value',
     if ts is not None:
         ts = helpers.format_ts(ts, time_period=time_period)
 
-    data_frames = []
+    data = get_data(param, station, ts=ts, idx=idx)
     
-    # If ts is not provided or goes beyond the historical range, get the corrected historical data
-    if ts is None or min(ts) <= (pd.Timestamp.now() - pd.DateOffset(months=3)):
-        # Download corrected historical data (last 3 months not available)
-        data_historical = get_corrected(param, station)
-        data_historical['Date'] = pd.to_datetime(data_historical['Date'], errors='coerce')
-        data_frames.append(data_historical)
+    return select_values(data, param, ts=ts, time_period=time_period, idx=idx, col=col)
 
-    # If ts is not provided or goes beyond the historical range, get the latest data as well
-    if ts is None or max(ts) > (pd.Timestamp.now() - pd.DateOffset(months=4)):
-        # Download latest 4 month data
-        data_latest = get_latest_months(param, station)
-        data_latest['Date'] = pd.to_datetime(data_latest['Date'], errors='coerce')
-        data_frames.append(data_latest)
 
-    # Concatenate historical and latest data
-    data = pd.concat(data_frames)
+def get_values_frame(params, station, ts=None, time_period=None, resolution=None, how='mean', join='outer'):
+    """
+    Get the values of several weather parameters for a station as one DataFrame aligned on the dates.
+    
+    :param params: List of weather parameters (either ID or name).
+    :param station: The station ID or name.
+    :param ts: Timestamp or tuple of timestamps.
+    :param time_period: Time period ('y', 'm', 's') for yearly, monthly, or seasonal data.
+    :param resolution: Optional resolution (e.g. 'D', '12h', 'h') to resample parameters at different
+                       cadences (hourly, daily at 00 or 06) to, see helpers.align_values.
+    :param how: Aggregation of the resampled values, or dictionary of aggregations by parameter name.
+    :param join: 'outer', 'inner' or 'left' (the dates of the first parameter).
+    :return: DataFrame with one column per weather parameter, named by parameter name.
+    """
+    if ts is not None:
+        ts = helpers.format_ts(ts, time_period=time_period)
+    
+    values = {}
+    for param in params:
+        data = get_data(param, station, ts=ts)
+        param_values = select_values(data, param, ts=ts, time_period=time_period)
+        values[param_values.name] = param_values
+    
+    return helpers.align_values(values, resolution=resolution, how=how, join=join)
 
-    # Automatically detect the correct index column if idx is not provided
-    if idx is None:
-        if 'Date (UTC)' in data.columns:
-            idx = 'Date (UTC)'  # Use 'Date (UTC)' if available (for hourly data)
-        elif 'Date' in data.columns:
-            idx = 'Date'  # Use 'Date' for daily data
-        else:
-            raise ValueError("Neither 'Date' nor 'Date (UTC)' columns found in the data.")
+
+def get_weather_data(param, station, ts=None, time_period=None, idx=None, col='Value'):
+    """
+    Get weather parameter values for a station and timestamp or time period (used by the climate indicators).
+
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param ts: Timestamp or tuple of timestamps.
+    :param time_period: Time period ('y', 'm', 's') for yearly, monthly, or seasonal data.
+    :param idx: The index column, detected automatically if not provided.
+    :param col: The column name to extract (default is 'Value').
+    :return: Filtered weather data, see get_values.
+    """
+    return get_values(param, station, ts=ts, time_period=time_period, idx=idx, col=col)
+
+
+def get_newer(data, param, station, idx):
+    """
+    Get the observations newer than the last timestamp in the data.
     
-    # Remove duplicates, keeping historical data for overlapping dates
-    data = data.drop_duplicates(subset=idx, keep='first')
-   
-    # Sort by the selected index for clean chronological ordering
-    data = data.sort_values(by=idx).reset_index(drop=True)
+    The latest periods are tried from the smallest to the largest, and the first one that
+    connects to the last observation in the data is used.
     
-    # Filter data based on ts and time_period if provided
-    if ts is not None:
-        values = helpers.filter_time(data, ts, time_period, idx=idx, col=col)
-    else:
-        values = data.set_index(idx)[col]
+    :param data: DataFrame from get_data, sorted by the index column.
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param idx: The index column.
+    :return: DataFrame with the newer observations in chronological order (empty if there are none),
+             or None if no latest period connects to the data.
+    """
+    last = data[idx].iloc[-1]
+    
+    # Time step of the series, used to check that the latest data connects to the stored data
+    steps = data[idx].tail(100).diff()
+    step = steps[steps > pd.Timedelta(0)].median()
+    if pd.isna(step):
+        step = pd.Timedelta(days=1)
+    
+    # Observation times are in UTC
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    for period in LATEST_PERIODS:
+        # No hourly values for daily parameters
+        if period == 'latest-hour' and step >= pd.Timedelta(days=1):
+            continue
+        
+        # Skip periods that are too short to reach back to the stored data
+        if now - pd.DateOffset(**LATEST_PERIOD_SPANS[period]) > last + step:
+            continue
+        
+        data_latest = parse_date_column(get_latest(param, station, period=period))
+        if data_latest.empty or idx not in data_latest.columns:
+            continue
+        
+        if data_latest[idx].min() <= last + step:
+            # Only observations newer than the stored data, in chronological order
+            data_new = data_latest.loc[data_latest[idx] > last].sort_values(by=idx)
+            return data_new.drop_duplicates(subset=idx, keep='first')
+    
+    return None
 
-    values.name = get_param_name(param)
-    return values
+
+def append_latest(data, param, station, idx=None):
+    """
+    Append observations newer than the last timestamp in the data.
+    
+    The latest periods are tried from the smallest to the largest, and the first one that
+    connects to the last stored observation is used (see get_newer). If none does, all data 
+    is downloaded again.
+    
+    :param data: DataFrame from get_data, sorted by the index column.
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param idx: The index column, detected automatically if not provided.
+    :return: DataFrame with the new observations appended (the same DataFrame if there are none).
+    """
+    if idx is None:
+        idx = get_index_column(data)
+    
+    data_new = get_newer(data, param, station, idx)
+    if data_new is None:
+        # The stored data is too old to connect to the latest data, download all data again
+        return get_data(param, station, idx=idx)
+    if data_new.empty:
+        return data
+    return pd.concat([data, data_new], ignore_index=True)
 
 
+def refresh_values(param, station, ts=None, time_period=None, idx=None, col='Value', rebuild=False, use_cache=None):
+    """
+    Get weather parameter values from a stored series that is refreshed incrementally.
+    
+    The first call downloads the full history (see get_data) and stores it in the on-disk 
+    cache with the station's 'updated' timestamp (see get_station_updated). As long as the
+    timestamp is unchanged, the stored series is used without downloading anything.
+    
+    When the station is updated, only observations newer than the last stored timestamp are
+    fetched, from the smallest latest period that covers them (see get_newer), and appended.
+    The appended observations are provisional. They are replaced by corrected data when the
+    full history is downloaded again, which happens once the corrected archive in the series
+    is ARCHIVE_REFRESH behind the archive published by SMHI (see ARCHIVE_DELAY), or when the
+    latest periods no longer reach back to the stored data.
+    
+    :param param: The weather parameter (either ID or name).
+    :param station: The station ID or name.
+    :param ts: Timestamp or tuple of timestamps.
+    :param time_period: Time period ('y', 'm', 's') for yearly, monthly, or seasonal data.
+    :param idx: The index column, detected automatically if not provided.
+    :param col: The column name to extract (default is 'Value').
+    :param rebuild: If True, download the full history again.
+    :param use_cache: Whether to use the on-disk cache (defaults to cache.USE_CACHE). Without
+                      the cache, the full history is downloaded on every call.
+    :return: Filtered weather data.
+    """
+    param = get_param_value(param)
+    station = get_station_value(station)
+    
+    if use_cache is None:
+        use_cache = cache.USE_CACHE
+    
+    # Stored series: the data, the last timestamp of the corrected archive in it and the 'updated' timestamp
+    series = None
+    updated = None
+    if use_cache:
+        updated = get_station_updated(param, station)
+        if not rebuild:
+            series = cache.load(param, station, 'series')
+    
+    if series is not None and series['updated'] == updated:
+        # Not updated by SMHI since it was stored
+        data = series['data']
+    else:
+        data = None
+        if series is not None:
+            # Observations newer than the stored data, unless the corrected archive has moved on
+            archive_end = series['archive_end']
+            now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+            if pd.isna(archive_end) or archive_end >= now - pd.DateOffset(**ARCHIVE_DELAY) - pd.DateOffset(**ARCHIVE_REFRESH):
+                data = series['data']
+                if idx is None:
+                    idx = get_index_column(data)
+                data_new = None if data.empty else get_newer(data, param, station, idx)
+                if data_new is None:
+                    data = None
+                elif not data_new.empty:
+                    data = pd.concat([data, data_new], ignore_index=True)
+        
+        if data is None:
+            # Full history
+            data, archive_end = get_data_archive_end(param, station, idx=idx)
+        
+        if use_cache:
+            series = {'data' : data, 'archive_end' : archive_end, 'updated' : updated}
+            cache.store(series, param, station, 'series', updated=updated)
+    
+    # Ensure ts is in datetime format for filtering, if provided
+    if ts is not None:
+        ts = helpers.format_ts(ts, time_period=time_period)
+    
+    return select_values(data, param, ts=ts, time_period=time_period, idx=idx, col=col)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Date parsing benchmark: measures the time to build the timestamps of a multi-decade hourly
+archive from its date and time columns, joining the strings and parsing them with format
+inference (the former parsing) and with helpers.parse_date_time, and fails if the speedup
+is below the required minimum.
+
+The archive is synthetic, with the date and time columns of hourly data from the corrected archive.
+
+Usage:
+    python benchmarks/date_parsing.py [years]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from ClimateWeatherData import helpers
+
+# Length of the archive in years
+YEARS = 30
+
+# Minimum speedup of helpers.parse_date_time
+MIN_SPEEDUP = 2
+REPEAT = 3
+
+
+def hourly_columns(years):
+    # 'Datum' and 'Tid (UTC)' columns as parsed from the CSV (strings)
+    dates = pd.date_range('1991-01-01', periods=years * 8760, freq='h')
+    return pd.Series(dates.strftime('%Y-%m-%d'), dtype=object), pd.Series(dates.strftime('%H:%M:%S'), dtype=object)
+
+
+def best_time(function):
+    times = []
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def main(years=YEARS):
+    dates, times = hourly_columns(int(years))
+
+    t_inferred, inferred = best_time(lambda: pd.to_datetime(dates.str.cat(times, sep=' ')))
+    t_parsed, parsed = best_time(lambda: helpers.parse_date_time(dates, times))
+    if not (inferred == parsed).all():
+        print('FAIL: the timestamps differ')
+        return 1
+
+    speedup = t_inferred / t_parsed
+    print(f'{len(dates)} hourly timestamps: joined strings {t_inferred * 1000:.0f} ms, '
+          f'parse_date_time {t_parsed * 1000:.0f} ms ({speedup:.1f}x, required {MIN_SPEEDUP}x)')
+    if speedup < MIN_SPEEDUP:
+        print('FAIL: speedup below the minimum')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
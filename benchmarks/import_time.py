@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark: measures the time to import the package in a fresh interpreter
+and fails if it exceeds the budget or if heavy dependencies are loaded on import.
+It also fails if the lazily imported modules, or the modules imported next to the
+package by the calling code, cannot be used after importing the package.
+
+Usage:
+    python benchmarks/import_time.py [budget in seconds]
+"""
+import os
+import subprocess
+import sys
+
+# Import time budget in seconds (best of REPEAT runs)
+IMPORT_TIME_BUDGET = 0.1
+REPEAT = 5
+
+# Modules that must not be loaded by importing the package
+HEAVY_MODULES = ['pandas', 'numpy', 'requests']
+
+CODE = """
+import sys, time
+t = time.perf_counter()
+import ClimateWeatherData.smhi, ClimateWeatherData.climate
+t = time.perf_counter() - t
+loaded = [m for m in {heavy} if m in sys.modules and type(sys.modules[m]).__name__ != '_LazyModule']
+print(t, ','.join(loaded))
+"""
+
+# Uses the lazily imported modules (through the package) and the modules a caller may import
+USE_CODE = """
+import ClimateWeatherData.smhi, ClimateWeatherData.climate, ClimateWeatherData.batch
+from ClimateWeatherData import helpers, smhi
+import asyncio, concurrent.futures
+asyncio.run(asyncio.sleep(0))
+with concurrent.futures.ThreadPoolExecutor(1) as executor:
+    executor.submit(int).result()
+assert smhi.get_many([]) == {}
+helpers.get_session()
+helpers.np.zeros(1)
+helpers.pd.Timestamp(0)
+"""
+
+
+def measure():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-c', CODE.format(heavy=HEAVY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True
+        )
+    t, loaded = result.stdout.split(' ')
+    return float(t), [m for m in loaded.strip().split(',') if m]
+
+
+def check_usage():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', USE_CODE], cwd=root, capture_output=True, text=True)
+    return result.returncode == 0, result.stderr.strip()
+
+
+def main(budget=IMPORT_TIME_BUDGET):
+    ok, error = check_usage()
+    if not ok:
+        print(f'FAIL: modules not usable after importing the package:\n{error}')
+        return 1
+    
+    times = []
+    for _ in range(REPEAT):
+        t, loaded = measure()
+        times.append(t)
+        if loaded:
+            print(f'FAIL: heavy modules loaded on import: {loaded}')
+            return 1
+    
+    best = min(times)
+    print(f'Import time: {best * 1000:.1f} ms (budget {budget * 1000:.0f} ms)')
+    if best > budget:
+        print('FAIL: import time budget exceeded')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[float(arg) for arg in sys.argv[1:]]))
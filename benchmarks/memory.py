@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark: measures the in-memory size of an hourly observation series as returned
+by smhi.get_data and after smhi.compact_data (the default of bulk loads with smhi.get_many),
+and fails if the reduction is below the required minimum.
+
+The series is synthetic, with the columns of hourly data from the corrected archive.
+
+Usage:
+    python benchmarks/memory.py [years]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from ClimateWeatherData import smhi
+
+# Length of the series in years
+YEARS = 30
+
+# Minimum relative memory reduction of the compact data
+MIN_REDUCTION = 0.6
+
+
+def hourly_data(years):
+    # Hourly series in the layout of smhi.get_data (date and time columns kept next to the parsed time)
+    dates = pd.date_range('1991-01-01', periods=years * 8760, freq='h')
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(5, 10, dates.size), 1)
+    return pd.DataFrame({
+        'Date' : pd.to_datetime(dates.strftime('%Y-%m-%d')),
+        'Tid (UTC)' : dates.strftime('%H:%M:%S'),
+        'Value' : values,
+        'Quality' : np.where(rng.random(dates.size) < .9, 'G', 'Y').astype(object),
+        'Date (UTC)' : dates,
+        })
+
+
+def main(years=YEARS):
+    data = hourly_data(int(years))
+    size = data.memory_usage(deep=True).sum()
+    compact_size = smhi.compact_data(data).memory_usage(deep=True).sum()
+
+    reduction = 1 - compact_size / size
+    print(f'{len(data)} hourly values: {size / 2**20:.1f} MB, compact {compact_size / 2**20:.1f} MB '
+          f'({reduction:.0%} less, required {MIN_REDUCTION:.0%})')
+    if reduction < MIN_REDUCTION:
+        print('FAIL: memory reduction below the minimum')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
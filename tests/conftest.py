@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ClimateWeatherData import api_endpoints, cache, smhi
+from fake_smhi import FakeSMHI
+
+
+@pytest.fixture
+def fake_smhi(tmp_path, monkeypatch):
+    """
+    The package pointed at a local stand-in for the SMHI API, with an empty cache directory.
+    """
+    fake = FakeSMHI().start()
+    base_url = api_endpoints.BASE_URL
+    api_endpoints.set_base_url(fake.base_url)
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cache, 'USE_CACHE', True)
+    smhi._station_catalogs.clear()
+    yield fake
+    smhi._station_catalogs.clear()
+    api_endpoints.set_base_url(base_url)
+    fake.stop()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the SMHI observations API, serving a small corrected archive (CSV),
+latest periods (JSON) and station catalogs in the layout of the real API.
+
+The data is synthetic and deterministic. Requests are counted by path, and the 'updated'
+timestamp of a station can be bumped to simulate new data published by SMHI.
+"""
+import json
+import re
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+
+
+# Parameters served, by time resolution
+HOURLY = {1}            # TemperaturePast1h
+DAILY = {2}             # TemperaturePast24h
+MONTHLY = {22}          # TemperatureMeanPastMonth
+
+STATIONS = {
+    162860 : ('Luleå-Kallax Flygplats', 65.5436, 22.1113),
+    97400 : ('Arlanda Flygplats', 59.6269, 17.9545),
+    }
+
+START = pd.Timestamp('2020-01-01')
+
+# Spans of the latest periods
+LATEST_SPANS = {
+    'latest-hour' : pd.Timedelta(hours=1),
+    'latest-day' : pd.Timedelta(days=1),
+    'latest-months' : pd.DateOffset(months=4)
+    }
+
+# Trailing columns of the first rows of an archive (ignored by the parser)
+TRAILER = ['Kvalitetskontrollerade historiska data (utom de senaste 3 mån)',
+           'Tidsperiod (fr.o.m.) = x', 'Tidsperiod (t.o.m.) = y', 'Samplingstid = Ej angivet']
+
+
+def to_ms(t):
+    return int(pd.Timestamp(t).value // 10**6)
+
+
+class FakeSMHI:
+    """
+    The stand-in server, started on a free local port.
+    """
+    def __init__(self):
+        self.now = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('h')
+        self.archive_end = (self.now - pd.DateOffset(months=3)).normalize()
+        self.updated = {station : to_ms('2024-01-01') for station in STATIONS}
+        self.requests = Counter()
+        self.server = None
+        
+        # Status codes returned instead of the data, by period
+        self.status = {}
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server.server_address[1])
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake.handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def bump_updated(self, station):
+        # New data published for the station
+        self.updated[station] += 1000
+
+    def count(self, period=None):
+        # Number of data requests, for one period or all periods
+        return sum(n for path, n in self.requests.items()
+                   if '/period/' in path and (period is None or '/period/{0}/'.format(period) in path))
+
+    def handle(self, handler):
+        path = handler.path
+        self.requests[path] += 1
+        status, body = 404, None
+        m = re.match(r'/api/version/1.0/parameter/(\d+)/station/(\d+)/period/([\w-]+)/data\.(\w+)$', path)
+        if m:
+            param, station, period = int(m[1]), int(m[2]), m[3]
+            if period in self.status:
+                status = self.status[period]
+            elif station in STATIONS and (param in HOURLY or param in DAILY or param in MONTHLY):
+                if period == 'corrected-archive':
+                    body, content_type = self.archive_csv(param, station), 'text/plain'
+                elif period in LATEST_SPANS and not (period == 'latest-hour' and param not in HOURLY):
+                    body, content_type = json.dumps(self.latest_json(param, station, period)), 'application/json'
+        m = re.match(r'/api/version/1.0/parameter/(\d+)\.json$', path)
+        if m:
+            body, content_type = json.dumps(self.parameter_json(int(m[1]))), 'application/json'
+
+        if body is None:
+            handler.send_response(status)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        data = body.encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type + '; charset=utf-8')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def series(self, param, station, end):
+        # Seasonal temperature with noise, hourly, daily or monthly
+        rng = np.random.default_rng(param * 1000 + station % 1000)
+        freq = 'h' if param in HOURLY else 'MS' if param in MONTHLY else 'D'
+        dates = pd.date_range(START, end, freq=freq)
+        day = dates.dayofyear.to_numpy()
+        values = (5 - 15 * np.cos(2 * np.pi * (day - 15) / 365) + rng.normal(0, 4, len(dates))).round(1)
+        return dates, values
+
+    def archive_csv(self, param, station):
+        name, lat, lon = STATIONS[station]
+        dates, values = self.series(param, station, self.archive_end)
+        lines = [
+            'Stationsnamn;Stationsnummer;Stationsnät;Mäthöjd (meter över marken)',
+            f'{name};{station};SMHIs stationsnät;2.0',
+            '',
+            'Parameternamn;Beskrivning;Enhet',
+            'Lufttemperatur;x;degree celsius',
+            '',
+            'Tidsperiod (fr.o.m);Tidsperiod (t.o.m);Höjd (meter över havet);Latitud (decimalgrad);Longitud (decimalgrad)',
+            f'{START};{self.archive_end};16.0;{lat};{lon}',
+            '',
+            ]
+        rows = []
+        if param in HOURLY:
+            lines.append('Datum;Tid (UTC);Lufttemperatur;Kvalitet;;Tidsutsnitt:')
+            for t, value in zip(dates, values):
+                rows.append(f'{t:%Y-%m-%d};{t:%H:%M:%S};{value};G')
+        elif param in MONTHLY:
+            lines.append('Från Datum Tid (UTC);Till Datum Tid (UTC);Representativ månad;Lufttemperatur;Kvalitet;;Tidsutsnitt:')
+            for t, value in zip(dates, values):
+                rows.append(f'{t:%Y-%m-%d} 00:00:01;{t + pd.offsets.MonthEnd():%Y-%m-%d} 23:59:59;{t:%Y-%m};{value};G')
+        else:
+            lines.append('Från Datum Tid (UTC);Till Datum Tid (UTC);Representativt dygn;Lufttemperatur;Kvalitet;;Tidsutsnitt:')
+            for t, value in zip(dates, values):
+                rows.append(f'{t - pd.Timedelta(hours=18):%Y-%m-%d %H:%M:%S};{t + pd.Timedelta(hours=6):%Y-%m-%d %H:%M:%S};'
+                            f'{t:%Y-%m-%d};{value};G')
+        for k, text in enumerate(TRAILER[:len(rows)]):
+            rows[k] += ';;' + text
+        return '\n'.join(lines + rows) + '\n'
+
+    def latest_json(self, param, station, period):
+        dates, values = self.series(param, station, self.now)
+        keep = dates > self.now - LATEST_SPANS[period]
+        values_json = []
+        for t, value in zip(dates[keep], values[keep]):
+            if param in HOURLY:
+                values_json.append({'date' : to_ms(t), 'value' : str(value), 'quality' : 'Y'})
+            elif param in MONTHLY:
+                values_json.append({'from' : to_ms(t), 'to' : to_ms(t + pd.offsets.MonthEnd()),
+                                    'ref' : f'{t:%Y-%m}', 'value' : str(value), 'quality' : 'Y'})
+            else:
+                values_json.append({'from' : to_ms(t - pd.Timedelta(hours=18)), 'to' : to_ms(t + pd.Timedelta(hours=6)),
+                                    'ref' : f'{t:%Y-%m-%d}', 'value' : str(value), 'quality' : 'Y'})
+        return {'value' : values_json, 'updated' : to_ms(self.now)}
+
+    def parameter_json(self, param):
+        stations = []
+        for station, (name, lat, lon) in STATIONS.items():
+            stations.append({'name' : name, 'id' : station, 'key' : str(station), 'latitude' : lat,
+                             'longitude' : lon, 'active' : True, 'from' : to_ms(START), 'to' : to_ms(self.now),
+                             'updated' : self.updated[station], 'height' : 10.0})
+        return {'key' : str(param), 'updated' : to_ms(self.now), 'station' : stations}
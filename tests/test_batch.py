@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import csv
+
+import pytest
+import requests
+
+from ClimateWeatherData import batch, smhi
+
+
+STATIONS = [162860, 97400]
+
+# TAS from the monthly archive, the vegetation season from daily temperatures
+INDICATORS = ['TAS', 'VegSeasonLentgh-5']
+
+
+def run(tmp_path, **kwargs):
+    output = tmp_path / 'indicators.csv'
+    failed = batch.run_batch(STATIONS, indicators=INDICATORS, ts=('2021', '2023'), time_period='y',
+                             output=str(output), processes=1, **kwargs)
+    with open(output, newline='', encoding='utf-8') as fp:
+        rows = list(csv.DictReader(fp))
+    return failed, rows
+
+
+def failing_get_data(monkeypatch, error):
+    # Loading the monthly temperatures fails
+    get_data = smhi.get_data
+
+    def get_data_failing(param, station, **kwargs):
+        if smhi.get_param_value(param) == 22:
+            raise error
+        return get_data(param, station, **kwargs)
+
+    monkeypatch.setattr(smhi, 'get_data', get_data_failing)
+    return get_data
+
+
+def test_monthly_and_daily_indicators(fake_smhi, tmp_path):
+    failed, rows = run(tmp_path)
+    assert failed == []
+    assert len(rows) == len(STATIONS) * 3
+    assert all(row['TAS'] and row['VegSeasonLentgh-5'] for row in rows)
+
+
+def test_load_error_empties_only_its_indicators(fake_smhi, tmp_path, monkeypatch):
+    failing_get_data(monkeypatch, ValueError('unknown layout'))
+    with pytest.warns(UserWarning, match='could not be loaded'):
+        failed, rows = run(tmp_path)
+    assert failed == []
+    assert all(row['TAS'] == '' and row['VegSeasonLentgh-5'] for row in rows)
+
+
+def test_download_error_fails_and_resumes(fake_smhi, tmp_path, monkeypatch):
+    get_data = failing_get_data(monkeypatch, requests.ConnectionError('connection reset'))
+    failed, rows = run(tmp_path)
+    assert failed == STATIONS
+    assert rows == []
+
+    monkeypatch.setattr(smhi, 'get_data', get_data)
+    failed, rows = run(tmp_path, resume=True)
+    assert failed == []
+    assert all(row['TAS'] for row in rows)
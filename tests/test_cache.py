@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import pytest
+
+from ClimateWeatherData import cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_store_and_load(cache_dir):
+    cache.store([1, 2], 18, 97400, 'corrected-archive', updated=5)
+    assert cache.load(18, 97400, 'corrected-archive', updated=5) == [1, 2]
+    assert cache.load(18, 97400, 'corrected-archive', updated=6) is None
+
+
+@pytest.mark.parametrize('entry', [
+    {'updated' : 5, 'data' : ['regn']},                                      # before format versions
+    {'version' : cache.FORMAT_VERSION - 1, 'updated' : 5, 'data' : ['regn']},
+    ])
+def test_other_format_versions_are_ignored(cache_dir, entry):
+    with open(cache.get_cache_path(18, 97400, 'corrected-archive'), 'wb') as fp:
+        pickle.dump(entry, fp)
+    assert cache.load(18, 97400, 'corrected-archive', updated=5) is None
+    assert cache.load(18, 97400, 'corrected-archive') is None
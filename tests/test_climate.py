@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import glob
+import os
+
+import pytest
+
+from ClimateWeatherData import cache, climate
+
+
+STATION = 162860
+
+
+@pytest.fixture
+def persistent_results(monkeypatch):
+    monkeypatch.setattr(climate, 'RESULT_CACHE_PERSISTENT', True)
+    climate.clear_results(persistent=False)
+    yield
+    climate.clear_results(persistent=False)
+
+
+def indicator_files(path):
+    return glob.glob(os.path.join(path, 'indicator_*'))
+
+
+def test_persistent_results(fake_smhi, tmp_path, persistent_results):
+    value = climate.TAS(STATION, '2021')
+    assert len(indicator_files(tmp_path)) == 1
+
+    climate.clear_results(persistent=False)
+    fake_smhi.requests.clear()
+    assert climate.TAS(STATION, '2021') == value
+    assert fake_smhi.count() == 0
+
+
+def test_persistent_results_follow_use_cache(fake_smhi, tmp_path, persistent_results, monkeypatch):
+    monkeypatch.setattr(cache, 'USE_CACHE', False)
+    climate.TAS(STATION, '2021')
+    assert os.listdir(tmp_path) == []
+
+
+def test_time_periods_from_indicators_json():
+    assert climate.get_indicator_periods('TAS') == ['s', 'y']
+    assert climate.get_indicator_periods('VegSeasonLentgh-3') == ['y']
+    assert climate.get_indicator_period('DTR') == 'm'
+    assert 'DTR' not in climate.get_indicator_names('y')
+    with pytest.raises(ValueError, match='not defined for DTR'):
+        climate.get_indicator_period('DTR', 'y')
+
+
+def test_compute_indicators_rejects_unlisted_periods(fake_smhi):
+    with pytest.raises(ValueError, match='not defined for TAS'):
+        climate.compute_indicators(STATION, '2021', time_period='m', indicators=['TAS'])
+
+
+def test_compute_indicators_typed_row(fake_smhi):
+    indicators = ['TAS', 'VegSeasonDayEnd-5', 'VegSeasonLentgh-5']
+    df = climate.compute_indicators(STATION, '2021-05-01', indicators=indicators)
+    assert list(df.index) == [STATION] and list(df.columns) == indicators
+    assert df['TAS'].dtype == float
+    assert df['VegSeasonDayEnd-5'].dtype.kind == 'M'
+    assert df.loc[STATION, 'TAS'] == climate.TAS(STATION, '2021-05-01')
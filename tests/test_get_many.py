@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pandas as pd
+import pytest
+
+from ClimateWeatherData import helpers, smhi
+
+
+PAIRS = [(param, station) for param in (1, 2, 22) for station in (162860, 97400)]
+
+
+@pytest.mark.parametrize('period, fetch', [
+    ('corrected-archive', smhi.get_corrected),
+    ('latest-months', smhi.get_latest_months),
+    ])
+def test_same_frames_as_the_synchronous_functions(fake_smhi, period, fetch):
+    results = smhi.get_many(PAIRS, period=period, max_concurrency=4, compact=False)
+    assert list(results) == PAIRS
+    for (param, station), data in results.items():
+        pd.testing.assert_frame_equal(data, fetch(param, station))
+
+
+def test_compact_by_default(fake_smhi):
+    results = smhi.get_many(PAIRS[:2])
+    for (param, station), data in results.items():
+        pd.testing.assert_frame_equal(data, smhi.compact_data(smhi.get_corrected(param, station)))
+
+
+def test_shared_session_is_not_changed(fake_smhi):
+    session = helpers.get_session()
+    pool_size = helpers.session_config['pool_size']
+    smhi.get_many(PAIRS, max_concurrency=pool_size + 6)
+    assert helpers.get_session() is session
+    assert helpers.session_config['pool_size'] == pool_size
+
+
+def test_running_event_loop(fake_smhi):
+    async def fetch():
+        with pytest.raises(RuntimeError, match='get_many_async'):
+            smhi.get_many(PAIRS)
+        return await smhi.get_many_async(PAIRS[:1])
+
+    assert list(asyncio.run(fetch())) == PAIRS[:1]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+import requests
+
+from ClimateWeatherData import smhi
+
+
+STATION = 162860
+
+
+def test_period_not_served_is_empty(fake_smhi):
+    # No latest-hour for daily values
+    assert smhi.get_latest(2, STATION, period='latest-hour').empty
+
+
+def test_next_period_after_a_period_not_served(fake_smhi):
+    # The planner picks latest-hour for the last half hour, daily values are in latest-day
+    now = fake_smhi.now
+    assert smhi.plan_periods((now - pd.Timedelta(minutes=30), now)) == ['latest-hour']
+    data = smhi.get_data(2, STATION, ts=(now - pd.Timedelta(minutes=30), now))
+    assert fake_smhi.count('latest-hour') == 1
+    assert fake_smhi.count('latest-day') == 1
+    pd.testing.assert_frame_equal(data, smhi.parse_date_column(smhi.get_latest(2, STATION, period='latest-day')))
+
+
+def test_error_status_is_raised(fake_smhi):
+    fake_smhi.status['latest-day'] = 500
+    with pytest.raises(requests.HTTPError, match='500'):
+        smhi.get_latest(2, STATION, period='latest-day')
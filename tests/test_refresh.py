@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+import pytest
+
+from ClimateWeatherData import cache, smhi
+
+
+STATION = 162860
+
+
+def refresh(fake, param, **kwargs):
+    # Values from refresh_values with the number of data requests by period
+    fake.requests.clear()
+    values = smhi.refresh_values(param, STATION, **kwargs)
+    counts = {period : fake.count(period) for period in ['corrected-archive'] + smhi.LATEST_PERIODS}
+    return values, {period : n for period, n in counts.items() if n}
+
+
+def publish(fake):
+    # New data published by SMHI, seen after the station catalog expires
+    fake.bump_updated(STATION)
+    smhi._station_catalogs.clear()
+
+
+@pytest.mark.parametrize('param', [1, 2])
+def test_unchanged_station_is_not_downloaded_or_stored(fake_smhi, param):
+    values, counts = refresh(fake_smhi, param)
+    assert counts == {'corrected-archive' : 1, 'latest-months' : 1}
+    pd.testing.assert_series_equal(values, smhi.get_values(param, STATION))
+
+    path = cache.get_cache_path(param, STATION, 'series')
+    mtime = os.stat(path).st_mtime_ns
+    values_again, counts = refresh(fake_smhi, param)
+    assert counts == {}
+    assert os.stat(path).st_mtime_ns == mtime
+    pd.testing.assert_series_equal(values_again, values)
+
+
+@pytest.mark.parametrize('param, period', [(1, 'latest-hour'), (2, 'latest-day')])
+def test_update_fetches_the_smallest_latest_period(fake_smhi, param, period):
+    refresh(fake_smhi, param)
+    publish(fake_smhi)
+    values, counts = refresh(fake_smhi, param)
+    assert counts == {period : 1}
+    pd.testing.assert_series_equal(values, smhi.get_values(param, STATION))
+
+
+def test_update_appends_newer_observations(fake_smhi):
+    refresh(fake_smhi, 1)
+    series = cache.load(1, STATION, 'series')
+    data = series['data']
+    series['data'] = data.iloc[:-3].reset_index(drop=True)
+    cache.store(series, 1, STATION, 'series', updated=series['updated'])
+
+    publish(fake_smhi)
+    values, counts = refresh(fake_smhi, 1)
+    assert counts == {'latest-day' : 1}
+    pd.testing.assert_series_equal(values, smhi.get_values(1, STATION))
+
+
+def test_archive_behind_downloads_the_full_history(fake_smhi):
+    refresh(fake_smhi, 2)
+    series = cache.load(2, STATION, 'series')
+    series['archive_end'] -= pd.DateOffset(months=2)
+    cache.store(series, 2, STATION, 'series', updated=series['updated'])
+
+    publish(fake_smhi)
+    _, counts = refresh(fake_smhi, 2)
+    assert counts == {'corrected-archive' : 1, 'latest-months' : 1}
+    assert cache.load(2, STATION, 'series')['archive_end'] == fake_smhi.archive_end
+
+
+def test_without_cache(fake_smhi, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'USE_CACHE', False)
+    _, counts = refresh(fake_smhi, 2, rebuild=True)
+    assert counts == {'corrected-archive' : 1, 'latest-months' : 1}
+    assert os.listdir(tmp_path) == []